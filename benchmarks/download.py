@@ -0,0 +1,99 @@
+"""
+Benchmark of the /download response: throughput and event loop lag of Starlette's FileResponse compared to
+ZeroCopyFileResponse while serving concurrent downloads.
+
+    python benchmarks/download.py --size 64 --clients 8 --downloads 4
+
+Event loop lag is measured inside the server: a task sleeps for a fixed interval and records how much later than
+requested it wakes up, which is the latency every other request would see at that time.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import FileResponse
+from starlette.routing import Route
+
+from soundboar.app.responses import ZeroCopyFileResponse
+
+
+class LagMonitor:
+    def __init__(self, interval: float = .005):
+        self.interval = interval
+        self.samples: list[float] = []
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+
+def serve(path: Path, monitor: LagMonitor) -> tuple[uvicorn.Server, int]:
+    tasks = set()
+
+    async def startup():
+        tasks.add(asyncio.create_task(monitor.run()))
+
+    app = Starlette(
+        routes=[
+            Route("/file", lambda request: FileResponse(path)),
+            Route("/zerocopy", lambda request: ZeroCopyFileResponse(path)),
+        ],
+        on_startup=[startup],
+    )
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(.01)
+    return server, server.servers[0].sockets[0].getsockname()[1]
+
+
+def download(url: str, downloads: int) -> int:
+    received = 0
+    with requests.Session() as session:
+        for _ in range(downloads):
+            with session.get(url, stream=True) as response:
+                for chunk in response.iter_content(1024 * 1024):
+                    received += len(chunk)
+    return received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="File size in MiB")
+    parser.add_argument("--clients", type=int, default=8, help="Number of concurrent clients")
+    parser.add_argument("--downloads", type=int, default=4, help="Downloads per client")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile() as file:
+        for _ in range(args.size):
+            file.write(bytes(1024 * 1024))
+        file.flush()
+        monitor = LagMonitor()
+        server, port = serve(Path(file.name), monitor)
+        print(f"{'response':<10} {'MiB/s':>8} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+        for route in ("file", "zerocopy"):
+            url = f"http://127.0.0.1:{port}/{route}"
+            download(url, 1)  # Warm up the page cache and connections
+            monitor.samples.clear()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.clients) as pool:
+                received = sum(pool.map(lambda _: download(url, args.downloads), range(args.clients)))
+            seconds = time.perf_counter() - start
+            lags = sorted(monitor.samples)
+            print(f"{route:<10} {received / seconds / 1024 ** 2:>8.1f} {statistics.median(lags) * 1000:>11.2f} "
+                  f"{lags[int(len(lags) * .99)] * 1000:>11.2f} {lags[-1] * 1000:>11.2f}")
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,37 @@
 import asyncio
+import functools
 import pathlib
+import queue
 from enum import Enum
 from http import HTTPStatus
-from io import BytesIO
 from pathlib import Path
+from typing import Annotated
 
 import requests
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Query, UploadFile, HTTPException, Request, Response
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.websockets import WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from starlette.responses import FileResponse
+from starlette.responses import StreamingResponse
 
 from soundboar import __title__, __version__, __source_root_dir__
-from soundboar.repository.Repository import Repository
-from soundboar.player import VLCPlayer
-from soundboar.app.api_types import File, Test
+from soundboar import logs
+from soundboar.repository.Repository import Repository, ChangeType, parse_roots
+from soundboar.repository.Importer import Importer
+from soundboar.repository.UsageStats import UsageStats
+from soundboar.player import VLCPlayer, NullPlayer, Priority, Zone
+from soundboar.app import protocol
+from soundboar.app.responses import ZeroCopyFileResponse
+from soundboar.app.api_types import File, Test, FileChange, FileChanges, ImportResult, Eta, encode_files
 from soundboar.player.Player import Player
-from soundboar.util import extract_meta, check_valid_audio_url, to_file_id, env
+from soundboar.player.Zone import DEFAULT_ZONE, parse_zones
+from soundboar.player.commands import combine_pause
+from soundboar.util import extract_meta, check_valid_audio_url, to_file_id, env, SUPPORTED_FILES
+from soundboar.util.audio import check_audio_stream
 from soundboar.util.openapi import custom_openapi
+from soundboar.util.profiling import Profiler, TimingMiddleware
 
 api = FastAPI()
 
@@ -33,9 +44,88 @@ if env.get(env.Var.CORS_ORIGIN) is not None:
         allow_headers=["*"],
     )
 
-supported_files = {".mp3", ".ogg", ".wav", ".flac"}
-repo = Repository(env.get(env.Var.DIRECTORY, parser=pathlib.Path) / "sounds", supported_files)
-player = VLCPlayer()
+supported_files = set(SUPPORTED_FILES)
+repo = Repository(
+    env.get(env.Var.ROOTS, "sounds", lambda value: parse_roots(value, env.get(env.Var.DIRECTORY))),
+    supported_files
+)
+importer = Importer(repo)
+usage = UsageStats(env.get(env.Var.DIRECTORY, parser=pathlib.Path) / "usage.json", keep=repo.catalog.__contains__)
+usage.load()
+
+
+def create_player(device: str | None) -> Player:
+    if env.get(env.Var.PLAYER) == "null":
+        return NullPlayer()
+    return VLCPlayer(device)
+
+
+def create_zone(name: str, device: str | None) -> Zone:
+    state_file = "player.json" if name == DEFAULT_ZONE else f"player-{name}.json"
+    zone = Zone(name, create_player(device), env.get(env.Var.DIRECTORY, parser=pathlib.Path) / state_file, repo, usage)
+    zone.open()
+    return zone
+
+
+zones: dict[str, Zone] = {
+    name: create_zone(name, device)
+    for name, device in env.get(env.Var.ZONES, DEFAULT_ZONE, parse_zones)
+}
+"""Zones by name, the player endpoints without zone prefix control the first one"""
+default_zone = next(iter(zones.values()))
+background_tasks: set[asyncio.Task] = set()
+
+profiler = Profiler(env.get(env.Var.DIRECTORY, parser=pathlib.Path) / "profiles")
+api.add_middleware(TimingMiddleware, profiler=profiler)
+if env.get(env.Var.PROFILE, False, parser=lambda x: x == "1"):
+    profiler.start()
+
+
+@api.on_event("startup")
+async def startup():
+    for zone in zones.values():
+        zone.player.bind()
+        background_tasks.add(asyncio.create_task(zone.prewarmer.run()))
+
+
+@api.on_event("shutdown")
+def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    usage.save()
+    for zone in zones.values():
+        zone.close()
+    profiler.stop()
+
+
+def get_zone(zone: str | None = None) -> Zone:
+    """The zone a request is for, the first zone if not given"""
+    if zone is None:
+        return default_zone
+    try:
+        return zones[zone]
+    except KeyError:
+        raise HTTPException(HTTPStatus.NOT_FOUND.value, detail=f"Zone {zone} does not exist")
+
+
+async def command(
+        zone: Zone,
+        fn,
+        *args,
+        priority: Priority = Priority.QUEUE,
+        key: str | None = None,
+        combine=None
+):
+    """Run a player command on the executor of the zone"""
+    try:
+        future = zone.executor.submit(fn, *args, priority=priority, key=key, combine=combine)
+    except queue.Full as e:
+        raise HTTPException(HTTPStatus.SERVICE_UNAVAILABLE.value, detail=str(e))
+    return await asyncio.wrap_future(future)
+
+
+zone_router = APIRouter()
+"""Player endpoints, available for the first zone and under /zones/{zone} for every zone"""
 
 
 @api.get("/websocket_debug")
@@ -43,71 +133,208 @@ def websocket_debug():
     return HTMLResponse(content=(__source_root_dir__ / "api" / "websocket.html").read_text())
 
 
-@api.get("/files")
-def files() -> dict[str, File]:
-    return dict(map(lambda x: (x[0], File.from_tuple(x)), repo.all()))
+files_body: tuple[int, bytes] | None = None
+"""Catalog version and encoded body of the last /files response"""
 
 
-@api.post("/play/{file_id}")
-def play(file_id: str):
-    player.play(repo.file(file_id))
+@api.get("/files", response_model=dict[str, File])
+def files(request: Request) -> Response:
+    """All files, the ETag is the catalog version to be used with /files/changes"""
+    version, infos = repo.snapshot()
+    headers = {"ETag": f'"{version}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=HTTPStatus.NOT_MODIFIED.value, headers=headers)
+    cached = files_body
+    if cached is not None and cached[0] == version:
+        return Response(cached[1], media_type="application/json", headers=headers)
 
+    def stream():
+        global files_body
+        chunks = []
+        for chunk in encode_files(infos):
+            chunks.append(chunk)
+            yield chunk
+        # Encoded once per catalog version, until then the body is reused
+        files_body = version, b"".join(chunks)
 
-@api.get("/download/{file_id}")
+    return StreamingResponse(stream(), media_type="application/json", headers=headers)
+
+
+@api.get("/files/changes")
+def file_changes(since: int) -> FileChanges:
+    """Changes to the files after catalog version `since`, 410 if these are unknown and /files has to be refetched"""
+    version = repo.version
+    changes = repo.changes_since(since)
+    if changes is None:
+        raise HTTPException(HTTPStatus.GONE.value, detail=f"Changes since version {since} are not available")
+    return FileChanges(version=version, changes=[
+        FileChange(
+            version=change.version,
+            type=change.type,
+            id=change.identifier,
+            previous_id=change.previous_identifier,
+            file=File.from_tuple(repo.file_info(change.identifier)) if change.type != ChangeType.REMOVED else None
+        )
+        for change in changes
+        if change.version <= version
+    ])
+
+
+def repo_file(file_id: str) -> Path:
+    """Path of a file in the repository, 404 if the ID cannot belong to a file in it"""
+    try:
+        return repo.file(file_id)
+    except FileNotFoundError:
+        raise HTTPException(HTTPStatus.NOT_FOUND.value, detail=f"File with ID {file_id} does not exist")
+
+
+def record_usage(file_id: str):
+    """Record a play of a file if it is in the catalog, IDs of other files are not stored"""
+    if file_id in repo.catalog:
+        usage.record(file_id)
+
+
+@api.post("/files/refresh")
+def refresh_files() -> int:
+    """Rescan the repository for files changed outside of soundboar, returns the new catalog version"""
+    return repo.refresh()
+
+
+@api.get("/search")
+def search(q: str, limit: int = 20, prefix: bool = False) -> list[File]:
+    """Fuzzy (or prefix) search over the names and paths of all files, best match first"""
+    return list(map(File.from_tuple, repo.search(q, limit, prefix)))
+
+
+@zone_router.post("/play/{file_id:path}")
+async def play(file_id: str, zone: Zone = Depends(get_zone)):
+    await command(zone, zone.player.play, repo_file(file_id), priority=Priority.TRANSPORT)
+    record_usage(file_id)
+
+
+@api.get("/download/{file_id:path}")
 def download(file_id: str):
-    file = repo.file(file_id)
+    file = repo_file(file_id)
     if not file.exists():
         raise HTTPException(404, detail=f"File with ID {file_id} does not exist")
     filename = file_id
     if not filename.endswith(file.suffix):
         filename += file.suffix
-    return FileResponse(file, media_type='application/octet-stream', filename=filename)
+    return ZeroCopyFileResponse(file, media_type='application/octet-stream', filename=filename)
+
+
+@zone_router.post("/pause")
+async def pause(do_pause: bool | None = None, zone: Zone = Depends(get_zone)) -> bool | None:
+    combine = functools.partial(combine_pause, zone.player)
+    return await command(zone, zone.player.pause, do_pause, priority=Priority.TRANSPORT, key="pause", combine=combine)
+
+
+@zone_router.post("/next")
+async def next_(zone: Zone = Depends(get_zone)):
+    return await command(zone, zone.player.next, priority=Priority.TRANSPORT)
+
+
+@zone_router.post("/previous")
+async def previous(zone: Zone = Depends(get_zone)):
+    return await command(zone, zone.player.previous, priority=Priority.TRANSPORT)
+
+
+@zone_router.post("/add/{file_id:path}")
+async def add(file_id: str, zone: Zone = Depends(get_zone)):
+    await command(zone, zone.player.add, repo_file(file_id))
+    record_usage(file_id)
+
+
+@zone_router.post("/stop")
+async def stop(zone: Zone = Depends(get_zone)):
+    await command(zone, zone.player.stop, priority=Priority.TRANSPORT, key="stop")
 
 
-@api.post("/pause")
-def pause(do_pause: bool | None = None) -> bool | None:
-    return player.pause(do_pause)
+@zone_router.post("/clear")
+async def clear(zone: Zone = Depends(get_zone)):
+    await command(zone, zone.player.clear, key="clear")
 
 
-@api.post("/next")
-def next_():
-    return player.next()
+@zone_router.post("/move")
+async def move(index: int, to: int, zone: Zone = Depends(get_zone)):
+    """Move the file at `index` in the playlist to index `to`, 400 if one of them is not in the playlist"""
+    try:
+        await command(zone, zone.player.move, index, to)
+    except IndexError as e:
+        raise HTTPException(HTTPStatus.BAD_REQUEST.value, detail=str(e))
 
 
-@api.post("/previous")
-def previous():
-    return player.previous()
+def _eta(player: Player, indexes: list[int]) -> Eta:
+    return Eta(
+        index=player.index(),
+        remaining=player.remaining(),
+        ends_in=player.start_time(player.size()),
+        starts_in={index: player.start_time(index) for index in indexes}
+    )
+
+
+@zone_router.get("/eta")
+async def eta(index: Annotated[list[int] | None, Query()] = None, zone: Zone = Depends(get_zone)) -> Eta:
+    """Remaining time of the current file, and when the playlist ends and the files at the given indexes start"""
+    return await command(zone, _eta, zone.player, index or [], priority=Priority.QUERY)
 
 
-@api.post("/add/{file_id}")
-def add(file_id: str):
-    player.add(repo.file(file_id))
+@zone_router.post("/volume")
+async def volume(level: int | None = None, zone: Zone = Depends(get_zone)) -> int:
+    """Set the volume (0-100) if given, returns the current volume"""
+    if level is None:
+        return await command(zone, zone.player.volume, priority=Priority.QUERY, key="volume")
+    return await command(zone, zone.player.volume, level, priority=Priority.TRANSPORT, key="set_volume")
 
 
-@api.post("/stop")
-def stop():
-    player.stop()
+@zone_router.get("/duration")
+async def duration(zone: Zone = Depends(get_zone)) -> int:
+    return await command(zone, zone.player.duration, priority=Priority.QUERY, key="duration")
 
 
-@api.post("/clear")
-def clear():
-    player.clear()
+@zone_router.get("/state")
+async def state(zone: Zone = Depends(get_zone)) -> Player.State:
+    return await command(zone, zone.player.state, priority=Priority.QUERY, key="state")
 
 
-@api.get("/duration")
-def duration() -> int:
-    return player.duration()
+def namespace_prefix(namespace: str | None) -> str:
+    """Prefix of the IDs of files in the root of `namespace` (empty if not given), 400 if there is no such root"""
+    if not namespace:
+        return ""
+    if namespace not in repo.namespaces:
+        raise HTTPException(HTTPStatus.BAD_REQUEST.value, detail=f"Unknown namespace {namespace}")
+    return namespace + "/"
 
 
-@api.get("/state")
-def state() -> Player.State:
-    return player.state()
+async def write_file(content, file_id: str) -> tuple[str, str, Path]:
+    """Write a file to the repository, 403 if its root is not writable"""
+    try:
+        return await repo.write(content, file_id)
+    except PermissionError as e:
+        raise HTTPException(HTTPStatus.FORBIDDEN.value, detail=str(e))
 
 
 @api.post("/file/{request_file_id}")
-async def upload_file(request_file_id: str, file: UploadFile) -> tuple[File, int]:
-    file_id = to_file_id(request_file_id, file.filename, supported_files)
-    return File.from_tuple(await repo.write(file.file, file_id)), repo.file_position(file_id)
+async def upload_file(request_file_id: str, file: UploadFile, namespace: str | None = None) -> tuple[File, int]:
+    """Upload a file, to the root of `namespace` if given"""
+    file_id = namespace_prefix(namespace) + to_file_id(request_file_id, file.filename, supported_files)
+    audio, content = await asyncio.to_thread(check_audio_stream, file.file, Path(file_id).suffix)
+    info = await write_file(content, file_id)
+    return File.from_tuple(info, audio), repo.file_position(file_id)
+
+
+@api.post("/import")
+async def import_files(files: list[UploadFile], prefix: str = "") -> list[ImportResult]:
+    """Import many files at once, zip archives are imported entry by entry"""
+    results = await asyncio.to_thread(importer.import_files, [(file.filename, file.file) for file in files], prefix)
+    return [
+        ImportResult(
+            name=result.name,
+            file=File.from_tuple(result.info, result.audio) if result.info else None,
+            error=result.error
+        )
+        for result in results
+    ]
 
 
 @api.get("/meta/og-title/{website:path}")
@@ -118,25 +345,158 @@ async def get_og_title(website: str) -> str | None:
 
 
 @api.post("/upload_from_url/{request_file_id}/{website:path}")
-async def upload_from_url(request_file_id: str, website: str) -> tuple[File, int]:
+async def upload_from_url(request_file_id: str, website: str, namespace: str | None = None) -> tuple[File, int]:
+    """Download the audio file of a website, to the root of `namespace` if given"""
+    prefix = namespace_prefix(namespace)
     data = await extract_meta(website, "og:audio")
     check_valid_audio_url(data["og:audio"], supported_files)
-    file_id = to_file_id(request_file_id, data["og:audio"], supported_files)
-    response = await asyncio.to_thread(requests.get, data["og:audio"], headers={'User-Agent': 'Mozilla/5.0'})
-    response.raise_for_status()
-    return File.from_tuple(await repo.write(BytesIO(response.content), file_id)), repo.file_position(file_id)
+    file_id = prefix + to_file_id(request_file_id, data["og:audio"], supported_files)
+    response = await asyncio.to_thread(
+        requests.get, data["og:audio"], headers={'User-Agent': 'Mozilla/5.0'}, stream=True
+    )
+    with response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        # Only the leading bytes are downloaded before the content is checked
+        audio, content = await asyncio.to_thread(check_audio_stream, response.raw, Path(file_id).suffix)
+        info = await write_file(content, file_id)
+    return File.from_tuple(info, audio), repo.file_position(file_id)
+
+
+@api.post("/rename/{file_id:path}")
+def rename_file(file_id: str, new_file_id: str) -> File:
+    new_file_id = to_file_id(new_file_id, file_id, supported_files)
+    try:
+        return File.from_tuple(repo.rename(file_id, new_file_id))
+    except FileNotFoundError:
+        raise HTTPException(HTTPStatus.NOT_FOUND.value, detail=f"File with ID {file_id} does not exist")
+    except FileExistsError:
+        raise HTTPException(HTTPStatus.CONFLICT.value, detail=f"File with ID {new_file_id} already exists")
+    except PermissionError as e:
+        raise HTTPException(HTTPStatus.FORBIDDEN.value, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(HTTPStatus.BAD_REQUEST.value, detail=str(e))
+
+
+@api.delete("/file/{file_id:path}")
+def delete_file(file_id: str):
+    try:
+        repo.delete(file_id)
+    except FileNotFoundError:
+        raise HTTPException(HTTPStatus.NOT_FOUND.value, detail=f"File with ID {file_id} does not exist")
+    except PermissionError as e:
+        raise HTTPException(HTTPStatus.FORBIDDEN.value, detail=str(e))
+
+
+@zone_router.websocket("/events")
+async def websocket_endpoint(
+        websocket: WebSocket,
+        since: int | None = None,
+        sequence: bool = False,
+        zone: Zone = Depends(get_zone)
+):
+    """
+    Stream player events. With `sequence` or `since`, events are sent as JSON with their sequence number and time, and
+    reconnecting clients can pass the last sequence number they received as `since` to replay what they missed.
+    If these events are no longer available, `{"reset": true}` is sent first and the state has to be refetched.
+    Clients requesting one of the subprotocols of `soundboar.app.protocol` can also send player commands on this
+    websocket, see there.
+    """
+    codec = protocol.negotiate(websocket)
+    await websocket.accept(subprotocol=codec.name if codec else None)
+    if codec is None and since is None and not sequence:
+        await _until_disconnect(websocket, _send_legacy_events(websocket, zone.player))
+        return
+    # A sequence number from the future is unknown as well, e.g. if the clock went backwards since the last restart
+    if since is not None and not zone.player.oldest_event() <= since + 1 <= zone.player.latest_event() + 1:
+        await websocket.send_json({"reset": True})
+        since = None
+    if codec is not None:
+        zone_commands = {name: functools.partial(fn, zone=zone) for name, fn in commands.items()}
+        await protocol.CommandChannel(websocket, codec, zone_commands).run(zone.player.events(since))
+        return
+    await _until_disconnect(websocket, _send_events(websocket, zone.player, since))
+
+
+async def _send_legacy_events(websocket: WebSocket, player: Player):
+    async for event in player.on_event():
+        await websocket.send_text(str(event))
 
 
-@api.delete("/file/{file_id}")
-def delete_file(file_id: str):
-    repo.delete(file_id)
+async def _send_events(websocket: WebSocket, player: Player, since: int | None):
+    async for seq, event, timestamp in player.events(since):
+        await websocket.send_json({"seq": seq, "event": event, "time": timestamp})
 
 
-@api.websocket("/events")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    async for event in player.on_event():
-        await websocket.send_text(str(event))
+async def _until_disconnect(websocket: WebSocket, coroutine):
+    """
+    Run a coroutine sending to the websocket until the client disconnects. Without reading from the websocket, a
+    disconnect is only noticed when the next event is sent, which keeps idle connections (and server shutdown) hanging.
+    """
+    async def receive():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {asyncio.create_task(coroutine), asyncio.create_task(receive())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    for task in done:
+        task.result()
+
+
+commands = {
+    "play": play,
+    "add": add,
+    "pause": pause,
+    "next": next_,
+    "previous": previous,
+    "stop": stop,
+    "clear": clear,
+    "move": move,
+    "eta": eta,
+    "volume": volume,
+    "duration": duration,
+    "state": state,
+}
+"""Commands accepted on the /events websocket, called with the zone of the websocket"""
+
+
+@zone_router.get("/admin/executor")
+def executor_stats(zone: Zone = Depends(get_zone)) -> dict:
+    """Statistics of the player command executor, including how long commands wait in its queue"""
+    return zone.executor.stats()
+
+
+@api.get("/zones")
+def list_zones() -> list[str]:
+    """Names of all zones, the first one is controlled by the player endpoints without zone prefix"""
+    return list(zones)
+
+
+@api.get("/admin/logging")
+def logging_stats() -> dict:
+    """Statistics of the log queue, including the number of records dropped because it was full"""
+    return logs.pipeline.stats()
+
+
+@api.get("/admin/profile")
+def profiling() -> bool:
+    return profiler.enabled
+
+
+@api.post("/admin/profile")
+def toggle_profiling(enabled: bool) -> list[str]:
+    """Start or stop profiling, stopping returns the files the results were written to"""
+    if enabled:
+        profiler.start()
+        return []
+    return list(map(str, profiler.stop()))
+
 
+api.include_router(zone_router)
+api.include_router(zone_router, prefix="/zones/{zone}")
 
 custom_openapi(api, Player.Event)
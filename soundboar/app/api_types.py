@@ -1,17 +1,84 @@
+from json.encoder import encode_basestring
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from pydantic import BaseModel
 
+from soundboar.util.audio import AudioInfo
+
 
 class File(BaseModel):
     id: str
     name: str
     location: Path
+    sample_rate: int | None = None
+    channels: int | None = None
 
     @classmethod
-    def from_tuple(cls, tpl):
+    def from_tuple(cls, tpl, audio: AudioInfo | None = None):
+        if audio is not None:
+            return File(id=tpl[0], name=tpl[1], location=tpl[2], sample_rate=audio.sample_rate, channels=audio.channels)
         return File(id=tpl[0], name=tpl[1], location=tpl[2])
 
 
+def encode_files(files: Iterable[tuple[str, str, Path]], chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    Encode files as JSON object of IDs to File, like FastAPI would encode dict[str, File], but without constructing
+    and validating a model per file
+    :param files: Tuples of ID, name and path
+    :param chunk_size: Number of files per chunk
+    :return: Chunks of the JSON document
+    """
+    yield b"{"
+    separator = ""
+    entries = []
+    for identifier, name, location in files:
+        key = encode_basestring(identifier)
+        entries.append(
+            f'{key}:{{"id":{key},"name":{encode_basestring(name)},"location":{encode_basestring(str(location))},'
+            f'"sample_rate":null,"channels":null}}'
+        )
+        if len(entries) == chunk_size:
+            yield (separator + ",".join(entries)).encode()
+            separator = ","
+            entries.clear()
+    if entries:
+        yield (separator + ",".join(entries)).encode()
+    yield b"}"
+
+
 class Test(BaseModel):
     wat: str
+
+
+class FileChange(BaseModel):
+    version: int
+    type: str
+    id: str
+    previous_id: str | None = None
+    file: File | None = None
+
+
+class FileChanges(BaseModel):
+    version: int
+    changes: list[FileChange]
+
+
+class Eta(BaseModel):
+    index: int | None
+    """Index of the current file"""
+
+    remaining: int | None
+    """Remaining time of the current file in ms"""
+
+    ends_in: int | None
+    """Time until the playlist ends in ms"""
+
+    starts_in: dict[int, int | None]
+    """Time until the files at the requested indexes start in ms, None for files before the current one"""
+
+
+class ImportResult(BaseModel):
+    name: str
+    file: File | None = None
+    error: str | None = None
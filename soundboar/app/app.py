@@ -8,7 +8,8 @@ from soundboar.app.api import api
 from soundboar.util import env
 
 STATIC_FILES = env.Var.DIRECTORY
-app = FastAPI()
+# Mounted apps do not receive lifespan events, so share the api's startup/shutdown handlers
+app = FastAPI(on_startup=api.router.on_startup, on_shutdown=api.router.on_shutdown)
 
 
 class FallbackStaticFiles(StaticFiles):
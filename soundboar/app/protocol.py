@@ -0,0 +1,143 @@
+"""
+Command protocol on the /events websocket.
+
+Clients select an encoding by requesting one of the subprotocols in `CODECS` (`soundboar.json` or, if msgpack is
+installed, `soundboar.msgpack`). On such a connection, clients send commands and receive acks and events:
+
+    -> {"id": 1, "cmd": "play", "args": {"file_id": "airhorn.mp3"}}
+    <- {"id": 1, "ok": true, "result": null}
+    <- {"seq": 1712345678901, "event": "filechange", "time": 1712345678.9}
+
+Results are encoded like the responses of the HTTP endpoints, e.g. models as objects. Failed commands are acked with
+`{"id": 1, "ok": false, "error": "..."}`.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.websockets import WebSocket, WebSocketDisconnect
+
+from soundboar.logs import logger
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+    name: str = None
+    binary: bool = False
+
+    def encode(self, message: dict[str, Any]) -> str | bytes:
+        raise NotImplementedError()
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        raise NotImplementedError()
+
+
+class JsonCodec(Codec):
+    name = "soundboar.json"
+
+    def encode(self, message: dict[str, Any]) -> str:
+        return json.dumps(message, separators=(",", ":"))
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        return json.loads(data)
+
+
+class MsgpackCodec(Codec):
+    name = "soundboar.msgpack"
+    binary = True
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        return msgpack.packb(message)
+
+    def decode(self, data: str | bytes) -> dict[str, Any]:
+        return msgpack.unpackb(data)
+
+
+CODECS: dict[str, Codec] = {JsonCodec.name: JsonCodec()}
+if msgpack is not None:
+    CODECS[MsgpackCodec.name] = MsgpackCodec()
+
+
+def negotiate(websocket: WebSocket) -> Codec | None:
+    """
+    Select the codec for a websocket by the subprotocols the client requested, in the client's order of preference
+    :return: Codec or None if the client did not request any supported one
+    """
+    for subprotocol in websocket.scope.get("subprotocols", ()):
+        if subprotocol in CODECS:
+            return CODECS[subprotocol]
+    return None
+
+
+class CommandChannel:
+    """
+    Serves a websocket: dispatches incoming commands concurrently and sends their acks together with events
+    """
+
+    def __init__(self, websocket: WebSocket, codec: Codec, commands: dict[str, Callable[..., Awaitable[Any]]]):
+        """
+        :param websocket: Accepted websocket
+        :param codec: Codec to encode and decode messages with
+        :param commands: Commands by their name, called with the arguments of the message as keyword arguments
+        """
+        self.websocket = websocket
+        self.codec = codec
+        self.commands = commands
+        self._send_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self, events: AsyncIterator[tuple[int, Any, float]]):
+        """
+        Serve the websocket until the client disconnects
+        :param events: Sequence numbers, events and their times to send
+        """
+        sender = asyncio.create_task(self._send_events(events))
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("bytes") if message.get("bytes") is not None else message.get("text")
+                task = asyncio.create_task(self._handle(data))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            for task in self._tasks:
+                task.cancel()
+
+    async def send(self, message: dict[str, Any]):
+        data = self.codec.encode(message)
+        async with self._send_lock:
+            if self.codec.binary:
+                await self.websocket.send_bytes(data)
+            else:
+                await self.websocket.send_text(data)
+
+    async def _send_events(self, events: AsyncIterator[tuple[int, Any, float]]):
+        async for sequence, event, timestamp in events:
+            await self.send({"seq": sequence, "event": event, "time": timestamp})
+
+    async def _handle(self, data: str | bytes):
+        request_id = None
+        try:
+            message = self.codec.decode(data)
+            request_id = message.get("id")
+            command = self.commands.get(message.get("cmd"))
+            if command is None:
+                raise ValueError(f"Unknown command {message.get('cmd')}")
+            result = jsonable_encoder(await command(**message.get("args", {})))
+            await self.send({"id": request_id, "ok": True, "result": result})
+        except HTTPException as e:
+            await self.send({"id": request_id, "ok": False, "error": e.detail})
+        except Exception as e:
+            logger.debug(f"Websocket command failed: {e}")
+            await self.send({"id": request_id, "ok": False, "error": str(e)})
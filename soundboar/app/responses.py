@@ -0,0 +1,49 @@
+import asyncio
+import os
+
+import anyio
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    File response which lets the server send the file without passing its contents through Python where possible:
+    via the ASGI zero-copy extension (`os.sendfile` in the server) or the path send extension. Otherwise, the file is
+    read on a worker thread, with the next chunk being read while the current one is sent. Chunks are as large as the
+    ones of FileResponse: sending larger ones blocks the event loop longer and raises the latency of other requests.
+    """
+
+    chunk_size = 64 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or "http.response.pathsend" in extensions or not hasattr(os, "pread"):
+            return await super().__call__(scope, receive, send)
+        stat_result = self.stat_result or await anyio.to_thread.run_sync(os.stat, self.path)
+        if self.stat_result is None:
+            self.set_stat_headers(stat_result)
+        with open(self.path, "rb") as file:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if "http.response.zerocopy" in extensions:
+                await send({"type": "http.response.zerocopy", "file": file, "more_body": False})
+            else:
+                await self._send_chunks(file.fileno(), stat_result.st_size, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_chunks(self, fd: int, size: int, send: Send):
+        offset = 0
+        pending = asyncio.ensure_future(asyncio.to_thread(os.pread, fd, self.chunk_size, offset))
+        try:
+            while True:
+                chunk = await pending
+                offset += len(chunk)
+                more_body = len(chunk) > 0 and offset < size
+                if more_body:
+                    pending = asyncio.ensure_future(asyncio.to_thread(os.pread, fd, self.chunk_size, offset))
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                if not more_body:
+                    return
+        finally:
+            pending.cancel()
@@ -1,8 +1,7 @@
+import contextlib
 import os
 import pathlib
 import shutil
-import zipfile
-from io import BytesIO
 
 import click
 
@@ -39,13 +38,15 @@ def cli(directory: str, log_level: str):
 @click.option("--skip-head", is_flag=True, default=False, help="Do not download and install the frontend")
 @click.option("--overwrite-head", is_flag=True, default=False, help="Overwrite existing frontend files")
 @click.option("--head-version", default=None, help="Frontend version to install, defaults to corresponding tail version")
+@click.option("--head-sha256", default=None, help="Expected SHA-256 checksum of the frontend archive")
 def install(
         mkdir: bool = True,
         force: bool = False,
         exist_ok: bool = True,
         skip_head: bool = False,
         overwrite_head: bool = False,
-        head_version: str = None
+        head_version: str = None,
+        head_sha256: str = None
 ):
     """Install soundboar by creating its data directory"""
     from soundboar import __default_data_dir__, __version__
@@ -65,36 +66,21 @@ def install(
         raise click.ClickException("Data directory does not exist")
     shutil.copytree(__default_data_dir__, path, dirs_exist_ok=force)
     if not skip_head:
-        import requests
-        from http import HTTPStatus
+        from platformdirs import user_cache_dir
+        from soundboar import __title__
+        from soundboar.cli.head import download, extract
         head_version = head_version or __version__
         if head_version[0] == "v":
             head_version = head_version[1:]
-        default_line_identifier = "soundboar-default-static"
         url = f"https://github.com/soundboar/head/releases/download/v{head_version}/dist.zip"
-        subdir = "dist/"
-        dest_dir = str(env.get(env.Var.DIRECTORY, parser=pathlib.Path) / "static") + "/"
-        response = requests.get(url)
-        if response.status_code != HTTPStatus.OK.value:
+        cache_dir = pathlib.Path(user_cache_dir(__title__, __title__)) / "head" / head_version
+        archive = download(url, cache_dir, head_sha256)
+        if archive is None:
             logger.error(f"Could not install frontend as the matching/requested version was not found. Expected: {url}")
-        with zipfile.ZipFile(BytesIO(response.content)) as zip_file:
-            logger.info(f"Downloading files from {url} (subdir={subdir}) to {dest_dir}")
-            for member in zip_file.infolist():
-                if not member.filename.startswith(subdir) or member.is_dir():
-                    continue
-                new_path = pathlib.Path(member.filename.replace(subdir, dest_dir))
-                if new_path.exists() and not overwrite_head:
-                    try:
-                        with open(new_path, 'r') as file:
-                            if default_line_identifier not in file.readline():
-                                logger.warn(f"Not overwriting {new_path} as it is not a default file")
-                                continue
-                    except UnicodeDecodeError:
-                        logger.warn(f"Not overwriting {new_path} as it is not a text file")
-                        continue
-                os.makedirs(os.path.dirname(new_path), exist_ok=True)
-                with zip_file.open(member, "r") as source, open(new_path, "wb") as destination:
-                    shutil.copyfileobj(source, destination)
+        else:
+            dest_dir = env.get(env.Var.DIRECTORY, parser=pathlib.Path) / "static"
+            logger.info(f"Installing files from {archive} (subdir=dist/) to {dest_dir}")
+            extract(archive, "dist/", dest_dir, overwrite_head)
 
     logger.info(f"Installed soundboar to {path}")
 
@@ -114,6 +100,8 @@ def uninstall():
 @click.option('--cors-origin', default=None, help="Allow a specific cors origin")
 @click.option('--host', default=None, help="Host on which to run the server")
 @click.option('--port', type=int, default=None, help="On which port to run the server")
+@click.option('--profile', is_flag=True, default=False,
+              help="Start with sampling profiling and endpoint timings enabled (toggle via /api/admin/profile)")
 
 @click.pass_context
 def run(
@@ -122,7 +110,8 @@ def run(
         development: bool,
         cors_origin: str | None,
         host: str | None,
-        port: int | None
+        port: int | None,
+        profile: bool
 ):
     """Run soundboar"""
     if not no_install:
@@ -145,6 +134,8 @@ def run(
             cors_origin = "http://localhost:5173"
     if cors_origin:
         env.set(env.Var.CORS_ORIGIN, cors_origin)
+    if profile:
+        env.set(env.Var.PROFILE, "1")
 
     import uvicorn
     from soundboar.util import env
@@ -155,6 +146,85 @@ def run(
                 **kwargs)
 
 
+@click.command("import")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--prefix", default="", help="Prefix for the IDs of the imported files")
+@click.option("--workers", type=int, default=4, help="Number of files to write concurrently")
+def import_(paths: tuple[str, ...], prefix: str, workers: int):
+    """Import sound files and zip archives of sound files into the data directory. A running server picks them up
+    on POST /api/files/refresh"""
+    from soundboar.repository.Repository import Repository, parse_roots
+    from soundboar.repository.Importer import Importer
+    from soundboar.util import env, SUPPORTED_FILES
+    from soundboar.logs import logger
+    repo = Repository(
+        env.get(env.Var.ROOTS, "sounds", lambda value: parse_roots(value, env.get(env.Var.DIRECTORY))),
+        SUPPORTED_FILES
+    )
+    with contextlib.ExitStack() as stack:
+        files = [(pathlib.Path(path).name, stack.enter_context(open(path, "rb"))) for path in paths]
+        results = Importer(repo, workers).import_files(files, prefix)
+    for result in results:
+        if result.error:
+            logger.warning(f"{result.name}: {result.error}")
+        else:
+            logger.info(f"{result.name} -> {result.info[0]}")
+    failed = sum(result.error is not None for result in results)
+    click.echo(f"Imported {len(results) - failed} files, {failed} failed")
+
+
+@click.command()
+@click.option("--duration", type=float, default=10., help="Seconds to measure")
+@click.option("--warmup", type=float, default=1., help="Seconds to run before measuring")
+@click.option("--clients", type=int, default=8, help="Number of concurrent HTTP clients")
+@click.option("--subscribers", type=int, default=4, help="Number of websocket subscribers on /events")
+@click.option("--mix", default="files=4,play=2,add=2,upload=1", help="Relative weights of the requested endpoints")
+@click.option("--player", type=click.Choice(["null", "vlc"]), default="null",
+              help="Player to run with, the null player does not play anything")
+@click.option("--use-data-dir", is_flag=True, default=False,
+              help="Run against the data directory instead of a temporary copy of the default data")
+@click.option("--json", "json_path", default=None, type=click.Path(dir_okay=False),
+              help="Also write the report as JSON to this file, - for stdout")
+def bench(
+        duration: float,
+        warmup: float,
+        clients: int,
+        subscribers: int,
+        mix: str,
+        player: str,
+        use_data_dir: bool,
+        json_path: str | None
+):
+    """Run soundboar in-process and measure throughput, latencies and event delivery lag under load"""
+    import json
+    from soundboar import __default_data_dir__
+    from soundboar.cli.bench import Bench, parse_mix, format_report, temporary_data_dir
+    from soundboar.util import env
+    try:
+        weights = parse_mix(mix)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--mix")
+    env.set(env.Var.PLAYER, player)
+    directory = None
+    if not use_data_dir:
+        directory = temporary_data_dir(__default_data_dir__)
+        env.set(env.Var.DIRECTORY, str(directory))
+    try:
+        report = Bench(weights, clients, subscribers, duration, warmup).run()
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+    if json_path == "-":
+        click.echo(json.dumps(report, indent=2))
+        return
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    click.echo(format_report(report))
+
+
 cli.add_command(install)
 cli.add_command(uninstall)
 cli.add_command(run)
+cli.add_command(import_)
+cli.add_command(bench)
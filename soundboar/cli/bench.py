@@ -0,0 +1,261 @@
+import io
+import json
+import os
+import pathlib
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from soundboar.logs import logger
+
+ENDPOINTS = ("files", "play", "add", "upload")
+"""Endpoints which can be part of the request mix"""
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """
+    Parse a request mix like `files=4,play=2,add=2,upload=1`
+    :param mix: Comma separated endpoints with their relative weights
+    :return: Weights per endpoint
+    """
+    weights = {}
+    for part in filter(None, map(str.strip, mix.split(","))):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint}, expected one of {', '.join(ENDPOINTS)}")
+        weights[endpoint] = int(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("The request mix must contain at least one endpoint with a positive weight")
+    return weights
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def summarize(latencies: list[float]) -> dict[str, float | None]:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def silent_wav(seconds: float = .1, sample_rate: int = 8000) -> bytes:
+    """A short silent mono WAV file to upload"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(2 * int(seconds * sample_rate)))
+    return buffer.getvalue()
+
+
+class Bench:
+    """
+    Load generator which runs the app in-process and drives it with concurrent HTTP clients and websocket
+    subscribers. Latencies are measured per endpoint on the client side, event delivery lag is the time between an
+    event being emitted by the player and a subscriber receiving it.
+    """
+
+    def __init__(
+            self,
+            mix: dict[str, int],
+            clients: int = 8,
+            subscribers: int = 4,
+            duration: float = 10.,
+            warmup: float = 1.
+    ):
+        """
+        :param mix: Relative weights of the endpoints the clients request
+        :param clients: Number of concurrent HTTP clients
+        :param subscribers: Number of websocket subscribers on /events
+        :param duration: Seconds to measure
+        :param warmup: Seconds to run before measuring
+        """
+        self.mix = mix
+        self.clients = clients
+        self.subscribers = subscribers
+        self.duration = duration
+        self.warmup = warmup
+        self.base_url = ""
+        self.file_ids: list[str] = []
+        self.uploads: list[str] = []
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.event_lags: list[float] = []
+        self._lock = threading.Lock()
+        self._measure_from = 0.
+        self._stop = threading.Event()
+        self._upload = silent_wav()
+
+    def run(self) -> dict:
+        """
+        Start the server, run the benchmark and stop the server again
+        :return: Report of the run
+        """
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(
+            "soundboar.app.app:app", host="127.0.0.1", port=0, log_config=None, log_level="warning", access_log=False
+        ))
+        thread = threading.Thread(target=server.run, name="bench-server", daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Server did not start")
+            time.sleep(.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/api"
+        try:
+            return self._run(f"ws://127.0.0.1:{port}/api/events?sequence=true")
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    def _run(self, events_url: str) -> dict:
+        import requests
+
+        self.file_ids = list(requests.get(f"{self.base_url}/files", timeout=10).json())
+        if not self.file_ids and ("play" in self.mix or "add" in self.mix):
+            raise RuntimeError("The repository has no files to play or add")
+        self._measure_from = time.perf_counter() + self.warmup
+        with ThreadPoolExecutor(self.clients + self.subscribers, thread_name_prefix="bench") as pool:
+            futures = [pool.submit(self._subscriber, events_url) for _ in range(self.subscribers)]
+            futures += [pool.submit(self._client) for _ in range(self.clients)]
+            time.sleep(self.warmup + self.duration)
+            self._stop.set()
+            for future in futures:
+                future.result()
+        with requests.Session() as session:
+            for file_id in self.uploads:
+                session.delete(f"{self.base_url}/file/{file_id}", timeout=10)
+        return self.report()
+
+    def _measuring(self) -> bool:
+        return time.perf_counter() >= self._measure_from
+
+    def _client(self):
+        import requests
+
+        endpoints, weights = zip(*self.mix.items())
+        rng = random.Random()
+        with requests.Session() as session:
+            while not self._stop.is_set():
+                endpoint = rng.choices(endpoints, weights)[0]
+                start = time.perf_counter()
+                try:
+                    ok = self._request(session, endpoint, rng)
+                except requests.RequestException as e:
+                    logger.debug(f"{endpoint} failed: {e}")
+                    ok = False
+                latency = time.perf_counter() - start
+                if self._measuring():
+                    with self._lock:
+                        self.latencies[endpoint].append(latency)
+                        if not ok:
+                            self.errors[endpoint] += 1
+
+    def _request(self, session, endpoint: str, rng: random.Random) -> bool:
+        if endpoint == "files":
+            response = session.get(f"{self.base_url}/files", timeout=30)
+        elif endpoint in ("play", "add"):
+            response = session.post(f"{self.base_url}/{endpoint}/{rng.choice(self.file_ids)}", timeout=30)
+        else:
+            file_id = f"bench-{uuid.uuid4().hex}"
+            response = session.post(
+                f"{self.base_url}/file/{file_id}", files={"file": (f"{file_id}.wav", self._upload)}, timeout=30
+            )
+            if response.ok:
+                with self._lock:
+                    self.uploads.append(response.json()[0]["id"])
+        return response.ok
+
+    def _subscriber(self, url: str):
+        from websockets.sync.client import connect
+
+        with connect(url) as websocket:
+            while not self._stop.is_set():
+                try:
+                    message = json.loads(websocket.recv(timeout=.1))
+                except TimeoutError:
+                    continue
+                lag = time.time() - message["time"] if "time" in message else None
+                if lag is not None and self._measuring():
+                    with self._lock:
+                        self.event_lags.append(lag)
+
+    def report(self) -> dict:
+        return {
+            "duration": self.duration,
+            "clients": self.clients,
+            "subscribers": self.subscribers,
+            "mix": self.mix,
+            "endpoints": {
+                endpoint: {
+                    "requests": len(latencies),
+                    "errors": self.errors[endpoint],
+                    "rps": round(len(latencies) / self.duration, 1),
+                } | summarize(latencies)
+                for endpoint, latencies in sorted(self.latencies.items())
+            },
+            "events": {"received": len(self.event_lags)} | summarize(self.event_lags),
+        }
+
+
+def format_report(report: dict) -> str:
+    """Format a report of Bench.run() as a table"""
+
+    def cell(value):
+        return "-" if value is None else f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    header = f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'rps':>8} " \
+             f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    lines = [header, "-" * len(header)]
+    for endpoint, stats in report["endpoints"].items():
+        lines.append(
+            f"{endpoint:<10} {stats['requests']:>9} {stats['errors']:>7} {cell(stats['rps']):>8} "
+            f"{cell(stats['p50_ms']):>8} {cell(stats['p95_ms']):>8} {cell(stats['p99_ms']):>8} "
+            f"{cell(stats['max_ms']):>8}"
+        )
+    events = report["events"]
+    lines.append("")
+    lines.append(
+        f"{'events':<10} {events['received']:>9} {'':>7} {'':>8} "
+        f"{cell(events['p50_ms']):>8} {cell(events['p95_ms']):>8} {cell(events['p99_ms']):>8} "
+        f"{cell(events['max_ms']):>8}  (delivery lag)"
+    )
+    return "\n".join(lines)
+
+
+def temporary_data_dir(source: pathlib.Path) -> pathlib.Path:
+    """
+    Copy a data directory to a temporary directory so that the benchmark does not modify it
+    :param source: Data directory to copy
+    :return: The temporary data directory, to be removed by the caller
+    """
+    directory = pathlib.Path(tempfile.mkdtemp(prefix="soundboar-bench-"))
+    shutil.copytree(source, directory, dirs_exist_ok=True)
+    for name in ("player.json", "usage.json", "profiles"):
+        path = directory / name
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            os.unlink(path)
+    return directory
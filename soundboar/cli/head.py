@@ -0,0 +1,134 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+import zipfile
+import zlib
+from http import HTTPStatus
+
+from soundboar.logs import logger
+
+DEFAULT_LINE_IDENTIFIER = "soundboar-default-static"
+"""Marker in the first line of frontend files which may be overwritten on install"""
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _sha256(path: pathlib.Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _crc32(path: pathlib.Path) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def download(url: str, cache_dir: pathlib.Path, sha256: str | None = None) -> pathlib.Path | None:
+    """
+    Download a file into the cache directory unless it is already cached. The download is streamed to a temporary
+    file and only moved into the cache after its checksum was verified.
+    :param url: URL to download
+    :param cache_dir: Directory to cache the file in, should be specific to the version of the file
+    :param sha256: Expected SHA-256 checksum, if not given the checksum published as `<url>.sha256` is used if there
+        is one
+    :return: Path to the cached file, None if it could not be downloaded
+    """
+    import requests
+
+    if sha256 is not None:
+        sha256 = sha256.strip().lower()
+    cached = cache_dir / pathlib.PurePosixPath(url).name
+    checksum_file = cached.with_name(cached.name + ".sha256")
+    if cached.exists() and checksum_file.exists():
+        checksum = checksum_file.read_text().strip().lower()
+        if (sha256 is None or sha256 == checksum) and _sha256(cached) == checksum:
+            logger.info(f"Using cached {cached}")
+            return cached
+        logger.warning(f"Cached {cached} does not match its checksum, downloading it again")
+
+    if sha256 is None:
+        response = requests.get(url + ".sha256", timeout=30)
+        if response.status_code == HTTPStatus.OK.value:
+            # The file may list the checksum followed by the file name, like the output of sha256sum
+            sha256 = next(iter(response.text.split()), "").lower() or None
+            if sha256 is None:
+                logger.warning(f"Published checksum of {url} is empty")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Downloading {url}")
+    with requests.get(url, stream=True, timeout=30) as response:
+        if response.status_code != HTTPStatus.OK.value:
+            logger.error(f"Could not download {url}: HTTP {response.status_code}")
+            return None
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as tmp:
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+    checksum = digest.hexdigest()
+    if sha256 is None:
+        logger.warning(f"No checksum of {url} given or published, using it unverified")
+    elif sha256 != checksum:
+        os.unlink(tmp.name)
+        logger.error(f"Checksum of {url} does not match: expected {sha256}, got {checksum}")
+        return None
+    os.replace(tmp.name, cached)
+    checksum_file.write_text(checksum)
+    return cached
+
+
+def extract(archive: pathlib.Path, subdir: str, dest_dir: pathlib.Path, overwrite: bool = False):
+    """
+    Extract the members of `subdir` in a zip archive into a directory. Members are first extracted next to their
+    destination and only moved into place once all of them were extracted. Files whose contents did not change are
+    skipped, and existing files are only overwritten if they are default files or `overwrite` is set.
+    :param archive: Zip archive to extract
+    :param subdir: Directory inside the archive to extract
+    :param dest_dir: Directory to extract to
+    :param overwrite: Overwrite existing files which are not default files
+    """
+    staged: list[tuple[str, pathlib.Path]] = []
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            for member in zip_file.infolist():
+                if not member.filename.startswith(subdir) or member.is_dir():
+                    continue
+                new_path = dest_dir / member.filename[len(subdir):]
+                if new_path.exists():
+                    if new_path.stat().st_size == member.file_size and _crc32(new_path) == member.CRC:
+                        logger.debug(f"Skipping unchanged {new_path}")
+                        continue
+                    if not overwrite:
+                        try:
+                            with open(new_path, 'r') as file:
+                                if DEFAULT_LINE_IDENTIFIER not in file.readline():
+                                    logger.warning(f"Not overwriting {new_path} as it is not a default file")
+                                    continue
+                        except UnicodeDecodeError:
+                            logger.warning(f"Not overwriting {new_path} as it is not a text file")
+                            continue
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+                with zip_file.open(member, "r") as source, \
+                        tempfile.NamedTemporaryFile(dir=new_path.parent, delete=False) as destination:
+                    staged.append((destination.name, new_path))
+                    while chunk := source.read(CHUNK_SIZE):
+                        destination.write(chunk)
+    except BaseException:
+        for tmp, _ in staged:
+            os.unlink(tmp)
+        raise
+    for tmp, new_path in staged:
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, new_path)
+    logger.info(f"Installed {len(staged)} changed files to {dest_dir}")
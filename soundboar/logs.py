@@ -1,6 +1,14 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import random
+import threading
+import time
 from copy import deepcopy
+from typing import Callable
 
 from uvicorn.config import LOGGING_CONFIG
 
@@ -10,6 +18,217 @@ DEFAULT_LOG_FORMAT = "%(pathname)s:%(lineno)d | %(asctime)s | %(levelname)-8s |
 DEFAULT_LOG_CONFIG = deepcopy(LOGGING_CONFIG)
 DEFAULT_LOG_CONFIG["formatters"]["default"]["fmt"] = DEFAULT_LOG_FORMAT
 _LEVELS = {"CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"}
+_IMMUTABLE = (str, int, float, bool, bytes, type(None))
+
+
+class LogPipeline:
+    """
+    Emits log records on a single background thread, so that slow log destinations (e.g. a stalling SD card) do not
+    delay the threads logging. The queue is bounded: when it is full, records are dropped and counted instead of
+    blocking the caller, and the number of dropped records is logged once the queue drains.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        """
+        :param max_size: Maximum number of queued records
+        """
+        self.queue: queue.Queue[tuple[logging.Handler, logging.LogRecord] | threading.Event] = queue.Queue(max_size)
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def put(self, handler: logging.Handler, record: logging.LogRecord):
+        """
+        Queue a record to be emitted by a handler, drops it if the queue is full
+        """
+        try:
+            self.queue.put_nowait((handler, record))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="soundboar-logging", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            handler, record = item
+            handler.handle(record)
+            if self.dropped != self._reported and self.queue.empty():
+                dropped, self._reported = self.dropped - self._reported, self.dropped
+                logging.getLogger(__title__).warning(f"Dropped {dropped} log records, the log queue was full")
+
+    def flush(self, timeout: float = 1.):
+        """
+        Wait until all queued records were emitted
+        :param timeout: Maximum number of seconds to wait
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def stats(self) -> dict[str, int]:
+        return {"queued": self.queue.qsize(), "max_size": self.queue.maxsize, "dropped": self.dropped}
+
+
+pipeline = LogPipeline()
+atexit.register(pipeline.flush)
+
+
+class QueuedHandler(logging.Handler):
+    """
+    Handler which emits records through the LogPipeline with a target handler created from `target` and the remaining
+    arguments. Level and filters of this handler are applied before queueing, the formatter is used by the target.
+    Usable with dictConfig:
+
+        {"()": "soundboar.logs.QueuedHandler", "target": "ext://logging.StreamHandler", "stream": "ext://sys.stderr"}
+    """
+
+    def __init__(self, target: Callable[..., logging.Handler] = logging.StreamHandler, **kwargs):
+        super().__init__()
+        self.target = target(**kwargs)
+
+    def setFormatter(self, fmt: logging.Formatter | None):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            pipeline.put(self.target, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    @staticmethod
+    def prepare(record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy a record so that it can be formatted later on another thread: arguments which may change until then are
+        merged into the message, tracebacks are formatted right away as they reference the frames
+        """
+        record = copy.copy(record)
+        if record.args and not all(isinstance(arg, _IMMUTABLE) for arg in _args(record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def flush(self):
+        pipeline.flush()
+
+    def close(self):
+        self.target.close()
+        super().close()
+
+
+def _args(args) -> tuple:
+    return tuple(args.values()) if isinstance(args, dict) else args
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes only a random sample of the records below WARNING of a logger and its children, other records pass.
+    Attached to handlers, as filters of a logger do not apply to records propagated from its children.
+    """
+
+    def __init__(self, rate: float, name: str = ""):
+        """
+        :param rate: Share of records to pass (0-1)
+        :param name: Logger whose records are sampled, all if empty
+        """
+        super().__init__(name)
+        self.rate = float(rate)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not super().filter(record):
+            return True
+        return random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes at most `rate` records below WARNING of a logger and its children per second on average, with bursts of up
+    to `burst` records, other records pass. Attached to handlers like SamplingFilter.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, name: str = ""):
+        """
+        :param rate: Records per second
+        :param burst: Maximum number of records passed at once, defaults to `rate`
+        :param name: Logger whose records are limited, all if empty
+        """
+        super().__init__(name)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.suppressed = 0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not super().filter(record):
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+            self.tokens -= 1
+            return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "path": record.pathname,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+def parse_logger_values(value: str) -> dict[str, float]:
+    """
+    Parse per logger values like `uvicorn.access=0.1,urllib3=0.5`, a value without logger name applies to the
+    soundboar logger
+    """
+    values = {}
+    for part in filter(None, map(str.strip, value.split(","))):
+        name, _, number = part.rpartition("=")
+        values[name.strip() or __title__] = float(number)
+    return values
 
 
 def setup(log_level: str = "NOTSET"):
@@ -23,6 +242,8 @@ def setup(log_level: str = "NOTSET"):
         logger = getLogger()
         logger.info('info message')
     """
+    from soundboar.util import env
+
     log_level = os.environ.setdefault("LOG_LEVEL", log_level)
     logging.getLogger().setLevel(log_level)
     # Copy the logging config from uvicorn to sqlalchemy and create a similar textada-logger
@@ -36,6 +257,29 @@ def setup(log_level: str = "NOTSET"):
         "fastapi": deepcopy(logger_template),
         "urllib3": deepcopy(logger_template),
     }
+    if env.get(env.Var.LOG_JSON, False, parser=lambda x: x == "1"):
+        logging_config["formatters"]["json"] = {"()": "soundboar.logs.JsonFormatter"}
+        for handler in logging_config["handlers"].values():
+            handler["formatter"] = "json"
+    queue_size = env.get(env.Var.LOG_QUEUE, 10_000, int)
+    if queue_size > 0:
+        pipeline.queue.maxsize = queue_size
+        for handler in logging_config["handlers"].values():
+            handler["()"] = "soundboar.logs.QueuedHandler"
+            handler["target"] = "ext://" + handler.pop("class")
+    filters = {}
+    for name, rate in env.get(env.Var.LOG_SAMPLING, "", parse_logger_values).items():
+        filters[f"sample {name}"] = {"()": "soundboar.logs.SamplingFilter", "rate": rate, "name": name}
+    for name, rate in env.get(env.Var.LOG_RATE_LIMIT, "", parse_logger_values).items():
+        filters[f"rate limit {name}"] = {"()": "soundboar.logs.RateLimitFilter", "rate": rate, "name": name}
+    logging_config["filters"] = filters
+    # Filters of a logger do not apply to records of its children, so they are applied by the handlers instead
+    for handler in logging_config["handlers"].values():
+        handler["filters"] = list(filters)
+    loggers = logging_config["loggers"]
+    for name in {config["name"] for config in filters.values()}:
+        if not any(name == logger_name or name.startswith(logger_name + ".") for logger_name in loggers):
+            loggers[name] = deepcopy(logger_template)
     logging.config.dictConfig(logging_config)
     return logging_config
 
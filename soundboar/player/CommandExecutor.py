@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from enum import IntEnum
+from typing import Any, Callable, Hashable
+
+Call = tuple[Callable[..., Any], tuple]
+"""A function together with its positional arguments"""
+
+
+class Priority(IntEnum):
+    """
+    Priorities of player commands, lower values are executed first
+    """
+
+    TRANSPORT = 0
+    """Commands controlling the playback, e.g. play, pause, next"""
+
+    QUEUE = 1
+    """Commands editing the playlist, e.g. add, clear"""
+
+    QUERY = 2
+    """Commands reading the state of the player"""
+
+
+class _Command:
+    __slots__ = ("priority", "sequence", "call", "futures", "key", "enqueued")
+
+    def __init__(self, priority: Priority, sequence: int, call: Call, key: Hashable | None):
+        self.priority = priority
+        self.sequence = sequence
+        self.call = call
+        self.futures: list[Future] = []
+        self.key = key
+        self.enqueued = time.perf_counter()
+
+    def __lt__(self, other: "_Command") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class CommandExecutor:
+    """
+    Executes player commands one after another on a single dedicated thread, so that calls into the player never run
+    concurrently and do not compete with other work for threadpool slots.
+    Pending commands are ordered by priority (FIFO within a priority), and commands sharing a key are merged while
+    they wait if no other command would be executed between them.
+    """
+
+    def __init__(self, max_pending: int = 64, name: str = "soundboar-player", window: int = 1000):
+        """
+        :param max_pending: Maximum number of pending commands, further commands are rejected
+        :param name: Name of the executing thread
+        :param window: Number of recent commands the wait time statistics are computed from
+        """
+        self.max_pending = max_pending
+        self._heap: list[_Command] = []
+        self._pending: dict[Hashable, _Command] = {}
+        self._last: dict[Priority, _Command] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._waits: deque[float] = deque(maxlen=window)
+        self._executed = 0
+        self._merged = 0
+        self._rejected = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(
+            self,
+            fn: Callable[..., Any],
+            *args,
+            priority: Priority = Priority.QUEUE,
+            key: Hashable | None = None,
+            combine: Callable[[Call, Call], Call] | None = None
+    ) -> Future:
+        """
+        Queue a command
+        :param fn: Function to execute
+        :param args: Arguments of the function
+        :param priority: Priority of the command
+        :param key: Commands with the same key and priority are merged while the pending one is the last queued
+            command of the priority, i.e. no other command would be executed between them: the pending command is
+            replaced by the new one (or by `combine(pending, new)`), and all submitters get its result
+        :param combine: Combines the call of a pending command with the call of a new one
+        :return: Future resolving to the result of the command
+        :raises queue.Full: If too many commands are pending
+        """
+        future = Future()
+        call = (fn, args)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Executor was shut down")
+            pending = self._pending.get(key) if key is not None else None
+            if pending is not None and self._last.get(priority) is pending:
+                pending.call = combine(pending.call, call) if combine else call
+                pending.futures.append(future)
+                self._merged += 1
+                return future
+            if len(self._heap) >= self.max_pending:
+                self._rejected += 1
+                raise queue.Full(f"More than {self.max_pending} pending player commands")
+            command = _Command(priority, next(self._sequence), call, key)
+            command.futures.append(future)
+            heapq.heappush(self._heap, command)
+            self._last[priority] = command
+            if key is not None:
+                self._pending[key] = command
+            self._condition.notify()
+        return future
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the executor after all pending commands were executed
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify()
+        if wait:
+            self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics about the executed commands and how long they waited in the queue
+        """
+        with self._condition:
+            waits = sorted(self._waits)
+            stats = {
+                "pending": len(self._heap),
+                "max_pending": self.max_pending,
+                "executed": self._executed,
+                "merged": self._merged,
+                "rejected": self._rejected,
+            }
+        if waits:
+            stats["wait_ms"] = {
+                "mean": sum(waits) / len(waits) * 1000,
+                "p50": waits[len(waits) // 2] * 1000,
+                "p95": waits[int(len(waits) * .95)] * 1000,
+                "max": waits[-1] * 1000,
+            }
+        return stats
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap and not self._shutdown:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                command = heapq.heappop(self._heap)
+                if command.key is not None and self._pending.get(command.key) is command:
+                    del self._pending[command.key]
+                if self._last.get(command.priority) is command:
+                    del self._last[command.priority]
+                self._waits.append(time.perf_counter() - command.enqueued)
+            # Futures whose callers cancelled them are not resolved, and the command is skipped if all were
+            futures = [future for future in command.futures if future.set_running_or_notify_cancel()]
+            if not futures:
+                continue
+            self._execute(command.call, futures)
+            with self._condition:
+                self._executed += 1
+
+    @staticmethod
+    def _execute(call: Call, futures: list[Future]):
+        fn, args = call
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            for future in futures:
+                _resolve(future.set_exception, e)
+        else:
+            for future in futures:
+                _resolve(future.set_result, result)
+
+
+def _resolve(set_outcome: Callable[[Any], None], outcome):
+    try:
+        set_outcome(outcome)
+    except InvalidStateError:
+        pass
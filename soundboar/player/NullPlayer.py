@@ -0,0 +1,180 @@
+import threading
+from os import PathLike
+from typing import Iterator, AsyncIterator
+
+from soundboar.util.CallbackToAsync import MakeAsync
+from soundboar.player.Player import Player
+
+
+class NullPlayer(Player):
+    """
+    Player which keeps a playlist and emits events like a real player, but does not play anything. Used to run and
+    benchmark the server on machines without libVLC or an audio device.
+    """
+
+    def __init__(self):
+        self.playlist: list[str] = []
+        self.current: int | None = None
+        self._volume = 100
+        self._state = Player.State.INITIATED
+        self._position = 0.
+        self.async_events = MakeAsync()
+        self._lock = threading.RLock()
+
+    def _emit(self, event: Player.Event):
+        self.async_events.event(event)
+        self._notify_listeners(event)
+
+    def _set_state(self, state: Player.State):
+        if state != self._state:
+            self._state = state
+            self._emit(Player.Event.STATE_CHANGE)
+
+    def _play_index(self, index: int):
+        self.current = index
+        self._position = 0.
+        self._emit(Player.Event.FILE_CHANGE)
+        self._set_state(Player.State.PLAYING)
+
+    def play(self, file: PathLike | str) -> str:
+        with self._lock:
+            index = 0 if self.current is None else self.current + 1
+            identifier = self.add(file, index)
+            self._play_index(index)
+            return identifier
+
+    def pause(self, state: bool | None = None) -> bool:
+        with self._lock:
+            if state is None:
+                state = self._state == Player.State.PLAYING
+            if self.current is not None:
+                self._set_state(Player.State.PAUSED if state else Player.State.PLAYING)
+            return state
+
+    def stop(self):
+        with self._lock:
+            self._set_state(Player.State.STOPPED)
+            self.current = None
+            self.clear()
+
+    def add(self, file: PathLike | str, index: int | None = None) -> str:
+        identifier = str(file)
+        with self._lock:
+            if index is None or index >= len(self.playlist):
+                self.playlist.append(identifier)
+            else:
+                self.playlist.insert(index, identifier)
+                if self.current is not None and index <= self.current:
+                    self.current += 1
+            self._emit(Player.Event.QUEUE_CHANGE)
+        return identifier
+
+    def remove(self, file_or_index: PathLike | str | int):
+        with self._lock:
+            if not isinstance(file_or_index, int):
+                if str(file_or_index) not in self.playlist:
+                    self._add_error(f"remove: File {file_or_index} not found")
+                    return
+                file_or_index = self.playlist.index(str(file_or_index))
+            if file_or_index < 0:
+                file_or_index = len(self.playlist) + file_or_index
+            del self.playlist[file_or_index]
+            if self.current is not None and file_or_index < self.current:
+                self.current -= 1
+            elif file_or_index == self.current:
+                self.current = None
+            self._emit(Player.Event.QUEUE_CHANGE)
+
+    def clear(self):
+        with self._lock:
+            if not self.playlist:
+                return
+            self.playlist.clear()
+            self.current = None
+            self._emit(Player.Event.QUEUE_CHANGE)
+
+    def move(self, index: int, new_index: int):
+        with self._lock:
+            size = len(self.playlist)
+            if not (0 <= index < size and 0 <= new_index < size):
+                raise IndexError(f"Cannot move index {index} to {new_index} in a playlist of {size} files")
+            identifier = self.playlist.pop(index)
+            self.playlist.insert(new_index, identifier)
+            if self.current == index:
+                self.current = new_index
+            elif self.current is not None:
+                if index < self.current <= new_index:
+                    self.current -= 1
+                elif new_index <= self.current < index:
+                    self.current += 1
+            self._emit(Player.Event.QUEUE_CHANGE)
+
+    def next(self):
+        with self._lock:
+            if self.current is not None and self.current + 1 < len(self.playlist):
+                self._play_index(self.current + 1)
+
+    def restart(self):
+        self.position(0)
+
+    def previous(self):
+        with self._lock:
+            if self.current:
+                self._play_index(self.current - 1)
+
+    def volume(self, volume: int | None = None) -> int:
+        with self._lock:
+            if volume is not None and volume != self._volume:
+                self._volume = volume
+                self._emit(Player.Event.VOLUME_CHANGE)
+            return self._volume
+
+    def state(self) -> Player.State:
+        return self._state
+
+    def position(self, position: float | None = None) -> float:
+        if position is not None:
+            self._position = position
+        return self._position
+
+    def index(self) -> int | None:
+        return self.current
+
+    def size(self) -> int:
+        return len(self.playlist)
+
+    def identifiers_from_to(self, start: int, end: int) -> Iterator[str]:
+        with self._lock:
+            return iter(self.playlist[max(0, start):end + 1])
+
+    def durations_from_to(self, start: int, end: int) -> Iterator[int]:
+        return (0 for _ in self.identifiers_from_to(start, end))
+
+    def restore(self, snapshot: Player.Snapshot):
+        with self._lock:
+            self.stop()
+            self.playlist = list(snapshot.identifiers)
+            if snapshot.volume is not None:
+                self.volume(snapshot.volume)
+            if snapshot.index is None or snapshot.state not in (Player.State.PLAYING, Player.State.PAUSED):
+                return
+            if not 0 <= snapshot.index < len(self.playlist):
+                self._add_error(f"restore: No file at index {snapshot.index}")
+                return
+            self._play_index(snapshot.index)
+            self._position = snapshot.position
+            if snapshot.state == Player.State.PAUSED:
+                self._set_state(Player.State.PAUSED)
+
+    def bind(self, loop=None):
+        self.async_events.bind(loop)
+
+    def oldest_event(self) -> int:
+        return self.async_events.oldest()
+
+    def latest_event(self) -> int:
+        return self.async_events.sequence
+
+    async def events(self, since: int | None = None) -> AsyncIterator[tuple[int, Player.Event, float]]:
+        async for sequence, event, timestamp in self.async_events.subscribe(since):
+            yield sequence, event[0][0], timestamp
@@ -1,7 +1,9 @@
+import asyncio
 import enum
+from dataclasses import dataclass, field
 from datetime import datetime
 from os import PathLike
-from typing import Optional, AsyncIterator, Tuple, Iterator
+from typing import Optional, AsyncIterator, Tuple, Iterator, Callable
 
 
 class Player:
@@ -11,6 +13,7 @@ class Player:
     """
 
     _last_error = None
+    _listeners: list[Callable[["Player.Event"], None]] = None
 
     class State(enum.StrEnum):
         """
@@ -49,8 +52,30 @@ class Player:
         FILE_CHANGE = "filechange"
         # POSITION_CHANGE = "positionchange"
         VOLUME_CHANGE = "volumechange"
+        QUEUE_CHANGE = "queuechange"
         ERROR = "error"
 
+    @dataclass
+    class Snapshot:
+        """
+        Restorable state of the player
+        """
+
+        identifiers: list[str] = field(default_factory=list)
+        """Identifiers of all files in the playlist"""
+
+        index: int | None = None
+        """Position of the current file in the playlist"""
+
+        position: float = 0.
+        """Position in the current file in percent"""
+
+        volume: int | None = None
+        """Volume level (0-100)"""
+
+        state: Optional["Player.State"] = None
+        """State of the player, only playing and paused are restored"""
+
     def play(self, file: PathLike | str) -> str:
         """
         Play this file right now. Afterward, continue with the playlist
@@ -62,6 +87,14 @@ class Player:
         """
         raise NotImplementedError()
 
+    def prepare(self, file: PathLike | str):
+        """
+        Prepare a file so that it starts faster when it is played or added next, e.g. by opening and parsing it in
+        advance. Does nothing by default.
+        :param file: File to prepare
+        """
+        pass
+
     def pause(self, state: bool | None = None) -> bool | None:
         """
         Play/pause the player
@@ -101,6 +134,15 @@ class Player:
         """
         raise NotImplementedError()
 
+    def move(self, index: int, new_index: int):
+        """
+        Move a file to another position in the playlist
+        :param index: Current index of the file
+        :param new_index: Index the file is moved to
+        :raises IndexError: If an index is not in the playlist, nothing is moved then
+        """
+        raise NotImplementedError()
+
     def next(self):
         """
         Jump to the next file
@@ -207,6 +249,31 @@ class Player:
         """
         return self.duration(relative=1)
 
+    def remaining(self) -> int | None:
+        """
+        Remaining time of the current file
+        :return: Remaining time in ms, None if there is no current file or its duration is unknown
+        """
+        duration = self.duration()
+        if duration is None or duration < 0:
+            return None
+        return int(duration * (1 - self.position()))
+
+    def start_time(self, index: int) -> int | None:
+        """
+        Time until the file at the given index starts playing, assuming the playlist is played without interruption.
+        Unknown durations count as 0.
+        :param index: Index of the file, the size of the playlist for the time until the playlist ends
+        :return: Time in ms, 0 for the current file, None for files before the current one
+        """
+        current = self.index()
+        if current is None:
+            return sum(max(duration, 0) for duration in self.durations_from_to(0, index - 1))
+        if index <= current:
+            return 0 if index == current else None
+        following = sum(max(duration, 0) for duration in self.durations_from_to(current + 1, index - 1))
+        return (self.remaining() or 0) + following
+
     def restart(self):
         """
         Restart this file
@@ -255,6 +322,26 @@ class Player:
         """
         raise NotImplementedError()
 
+    def snapshot(self) -> Snapshot:
+        """
+        Get the current state of the player which can be restored with restore()
+        :return: Snapshot of the current state
+        """
+        return Player.Snapshot(
+            identifiers=list(self.all_identifiers()),
+            index=self.index(),
+            position=self.position(),
+            volume=self.volume(),
+            state=self.state()
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Restore a snapshot created by snapshot(), replaces the current playlist
+        :param snapshot: Snapshot to restore
+        """
+        raise NotImplementedError()
+
     def last_error(self) -> Tuple[datetime, str] | None:
         """
         Get the last error of the player and when it occurred
@@ -265,9 +352,50 @@ class Player:
     def _add_error(self, msg: str):
         self._last_error = (datetime.now(), msg)
 
+    def add_listener(self, listener: Callable[[Event], None]):
+        """
+        Register a callback which is called synchronously (possibly from a player thread) on every event
+        :param listener: Callback receiving the event
+        """
+        if self._listeners is None:
+            self._listeners = []
+        self._listeners.append(listener)
+
+    def _notify_listeners(self, event: Event):
+        for listener in self._listeners or ():
+            listener(event)
+
+    def bind(self, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        Bind the delivery of events to an event loop
+        :param loop: Event loop the events are consumed in, defaults to the running one
+        """
+        pass
+
+    def oldest_event(self) -> int:
+        """
+        Sequence number of the oldest event events() can still replay
+        """
+        raise NotImplementedError()
+
+    def latest_event(self) -> int:
+        """
+        Sequence number of the latest event
+        """
+        raise NotImplementedError()
+
+    async def events(self, since: int | None = None) -> AsyncIterator[Tuple[int, Event, float]]:
+        """
+        Get an infinite iterator which yields events with their sequence number and time (seconds since the epoch)
+        without any further information
+        :param since: Sequence number of the last event known, replay all events after it. Only new events if None
+        """
+        raise NotImplementedError()
+
     async def on_event(self) -> AsyncIterator[Event]:
         """
         Get an infinite iterator which yields events without any further information
         Get further information yourself
         """
-        raise NotImplementedError()
+        async for _, event, _ in self.events():
+            yield event
@@ -0,0 +1,106 @@
+import dataclasses
+import json
+import os
+import threading
+from os import PathLike
+from pathlib import Path
+
+from soundboar.logs import logger
+from soundboar.player.CommandExecutor import CommandExecutor, Priority
+from soundboar.player.Player import Player
+
+
+class PlayerStateStore:
+    """
+    Persists snapshots of a player to a JSON file so the playlist, position, volume and state survive a restart.
+    Saves are coalesced: the first event after a save schedules the next one, all further events until then are
+    covered by it.
+    """
+
+    def __init__(
+            self,
+            player: Player,
+            path: PathLike | str,
+            delay: float = 1.,
+            executor: CommandExecutor | None = None
+    ):
+        """
+        :param player: Player to persist
+        :param path: File to store the state in
+        :param delay: Seconds to wait after an event before saving
+        :param executor: If given, the player is only accessed through this executor
+        """
+        self.player = player
+        self.path = Path(path)
+        self.delay = delay
+        self.executor = executor
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def attach(self):
+        """
+        Save the state whenever the player emits an event
+        """
+        self.player.add_listener(self.schedule)
+
+    def schedule(self, *_):
+        """
+        Schedule a save unless one is already pending
+        """
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.delay, self._save_scheduled)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _save_scheduled(self):
+        with self._lock:
+            self._timer = None
+        self.save()
+
+    def save(self):
+        """
+        Save the current state of the player atomically
+        """
+        try:
+            if self.executor is not None:
+                snapshot = self.executor.submit(self.player.snapshot, priority=Priority.QUERY, key="snapshot").result()
+            else:
+                snapshot = self.player.snapshot()
+            data = dataclasses.asdict(snapshot)
+        except Exception as e:
+            logger.warning(f"Could not snapshot player state: {e}")
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def load(self) -> Player.Snapshot | None:
+        """
+        Load the last saved state
+        :return: Saved snapshot or None if there is no (valid) saved state
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("state") is not None:
+                data["state"] = Player.State(data["state"])
+            return Player.Snapshot(**data)
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Ignoring invalid player state in {self.path}: {e}")
+            return None
+
+    def restore(self):
+        """
+        Restore the last saved state into the player
+        """
+        snapshot = self.load()
+        if snapshot is not None:
+            self.player.restore(snapshot)
+            logger.info(f"Restored player state with {len(snapshot.identifiers)} queued files")
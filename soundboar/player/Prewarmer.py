@@ -0,0 +1,92 @@
+import asyncio
+import os
+from pathlib import Path
+
+from soundboar.logs import logger
+from soundboar.player.CommandExecutor import CommandExecutor, Priority
+from soundboar.player.Player import Player
+from soundboar.repository.Repository import Repository
+from soundboar.repository.UsageStats import UsageStats
+
+
+def read_into_page_cache(path: Path, chunk_size: int = 1024 * 1024):
+    """
+    Make the OS read a file into its page cache
+    """
+    with open(path, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while f.read(chunk_size):
+                pass
+
+
+class Prewarmer:
+    """
+    Warms the most used files so that they start as fast as in steady state, even right after a reboot: their
+    contents are read into the page cache, their metadata is fetched, and the player prepares them for playback.
+    Files are warmed on startup and periodically while the player is idle.
+    """
+
+    def __init__(
+            self,
+            player: Player,
+            executor: CommandExecutor,
+            repository: Repository,
+            usage: UsageStats,
+            count: int = 20,
+            interval: float = 300.
+    ):
+        """
+        :param player: Player to prepare the files in
+        :param executor: Executor the player is accessed through
+        :param repository: Repository containing the files
+        :param usage: Usage statistics to select the files by, saved on every run
+        :param count: Number of files to warm
+        :param interval: Seconds between two runs
+        """
+        self.player = player
+        self.executor = executor
+        self.repository = repository
+        self.usage = usage
+        self.count = count
+        self.interval = interval
+
+    def warm(self) -> int:
+        """
+        Warm the most used files
+        :return: Number of warmed files
+        """
+        warmed = 0
+        for identifier in self.usage.top():
+            if warmed >= self.count:
+                break
+            if identifier not in self.repository.catalog:
+                continue
+            _, _, path = self.repository.file_info(identifier)
+            try:
+                read_into_page_cache(path)
+            except OSError as e:
+                logger.debug(f"Could not warm {identifier}: {e}")
+                continue
+            self.executor.submit(self.player.prepare, path, priority=Priority.QUERY, key=("prepare", identifier))
+            warmed += 1
+        return warmed
+
+    async def idle(self) -> bool:
+        state = await asyncio.wrap_future(self.executor.submit(self.player.state, priority=Priority.QUERY, key="state"))
+        return state not in (Player.State.PLAYING, Player.State.OPENING, Player.State.BUFFERING)
+
+    async def run(self):
+        """
+        Warm the files now and then periodically while the player is idle, saving the usage statistics each time
+        """
+        while True:
+            try:
+                if await self.idle():
+                    warmed = await asyncio.to_thread(self.warm)
+                    logger.debug(f"Prewarmed {warmed} files")
+                await asyncio.to_thread(self.usage.save)
+            except Exception as e:
+                logger.warning(f"Prewarming failed: {e}")
+            await asyncio.sleep(self.interval)
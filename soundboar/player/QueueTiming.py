@@ -0,0 +1,71 @@
+import threading
+
+
+class QueueTiming:
+    """
+    Durations of the files in a playlist with cumulative sums. Changes only invalidate the sums from the changed
+    position on, which are recomputed on the next query, so appending files and querying start times is O(1) amortized
+    and a change in the middle costs at most one pass over the following files.
+    Unknown durations (negative) count as 0.
+    """
+
+    def __init__(self):
+        self.durations: list[int] = []
+        # _sums[i] is the sum of the first i durations, valid up to _valid
+        self._sums: list[int] = [0]
+        self._valid = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def insert(self, index: int | None, duration: int):
+        """
+        Insert a duration at the given index, at the end if None
+        """
+        with self._lock:
+            if index is None or index >= len(self.durations):
+                index = len(self.durations)
+            self.durations.insert(index, duration)
+            self._invalidate(index)
+
+    def remove(self, index: int):
+        with self._lock:
+            del self.durations[index]
+            self._invalidate(index if index >= 0 else 0)
+
+    def set(self, index: int, duration: int):
+        with self._lock:
+            self.durations[index] = duration
+            self._invalidate(index)
+
+    def move(self, index: int, new_index: int):
+        with self._lock:
+            self.durations.insert(new_index, self.durations.pop(index))
+            self._invalidate(min(index, new_index))
+
+    def reset(self, durations: list[int] | None = None):
+        with self._lock:
+            self.durations = list(durations or [])
+            self._invalidate(0)
+
+    def start(self, index: int) -> int:
+        """
+        Sum of the durations before the given index
+        :param index: Index in the playlist, clamped to the playlist
+        :return: Duration in ms
+        """
+        with self._lock:
+            index = max(0, min(index, len(self.durations)))
+            if index > self._valid:
+                del self._sums[self._valid + 1:]
+                for i in range(self._valid, index):
+                    self._sums.append(self._sums[i] + max(self.durations[i], 0))
+                self._valid = index
+            return self._sums[index]
+
+    def total(self) -> int:
+        return self.start(len(self.durations))
+
+    def _invalidate(self, index: int):
+        self._valid = min(self._valid, max(index, 0))
@@ -1,16 +1,22 @@
+import threading
 from os import PathLike
 from typing import Iterator, AsyncIterator
 
-from vlc import MediaListPlayer, EventType, Media, MediaList, Instance, MediaPlayer, MediaParsedStatus
+from vlc import MediaListPlayer, EventType, Media, MediaList, Instance, MediaPlayer, MediaParsedStatus, MediaParseFlag
 
 from soundboar.util.CallbackToAsync import MakeAsync
 from soundboar.player import Player
+from soundboar.player.QueueTiming import QueueTiming
 
 
 class VLCPlayer(Player):
     media_list_player: MediaListPlayer = None
     media_list: MediaList = None
     async_events: MakeAsync = None
+    timing: QueueTiming = None
+    """Durations of the files in the playlist, kept in sync with the media list"""
+    max_prepared: int = 32
+    """Maximum number of prepared media, the oldest ones are dropped first"""
 
     EVENT_MAPPING = {
         EventType.MediaPlayerMediaChanged: Player.Event.FILE_CHANGE,
@@ -23,6 +29,11 @@ class VLCPlayer(Player):
         EventType.MediaPlayerAudioVolume: Player.Event.VOLUME_CHANGE,
     }
 
+    LIST_EVENT_MAPPING = {
+        EventType.MediaListItemAdded: Player.Event.QUEUE_CHANGE,
+        EventType.MediaListItemDeleted: Player.Event.QUEUE_CHANGE,
+    }
+
     STATE_MAPPING = {
         0: Player.State.INITIATED,
         1: Player.State.OPENING,
@@ -46,17 +57,37 @@ class VLCPlayer(Player):
     def media(self) -> Media | None:
         return self.media_player.get_media()
 
-    def __init__(self):
+    def __init__(self, device: str | None = None):
+        """
+        :param device: Audio output device to play on, the default device if None
+        """
         self.media_list = MediaList()
         self.media_list_player = MediaListPlayer()
         self.media_list_player.set_media_list(self.media_list)
+        if device is not None:
+            self.media_player.audio_output_device_set(None, device)
         self.async_events = MakeAsync()
+        self.timing = QueueTiming()
+        self._prepared: dict[str, Media] = {}
+        # Media whose duration is not yet known, they are parsed in the background
+        self._unparsed: list[Media] = []
+        # Position and pause state of a restored snapshot, applied once its file is playing
+        self._resume_at: tuple[float, bool] | None = None
         event_manager = self.media_player.event_manager()
         for event in self.EVENT_MAPPING:
             event_manager.event_attach(event, self.handle_event)
+        list_event_manager = self.media_list.event_manager()
+        for event in self.LIST_EVENT_MAPPING:
+            list_event_manager.event_attach(event, self.handle_event)
 
     def handle_event(self, event):
-        self.async_events.event(self.EVENT_MAPPING[event.type])
+        if event.type == EventType.MediaPlayerPlaying and self._resume_at is not None:
+            resume_at, self._resume_at = self._resume_at, None
+            # libVLC must not be called from its event callbacks
+            threading.Thread(target=self._resume, args=resume_at, name="soundboar-resume", daemon=True).start()
+        event = self.EVENT_MAPPING.get(event.type) or self.LIST_EVENT_MAPPING[event.type]
+        self.async_events.event(event)
+        self._notify_listeners(event)
 
     def play(self, file: PathLike | str):
         current_media = self.media_player.get_media()
@@ -65,9 +96,20 @@ class VLCPlayer(Player):
         else:
             current_index = self.media_list.count() - 1
         self.add(file, current_index + 1)
+        self._resume_at = None
         self.media_list_player.play_item_at_index(current_index + 1)
         return self.media_player.get_media().get_mrl()
 
+    def prepare(self, file: PathLike | str):
+        key = str(file)
+        if key in self._prepared:
+            return
+        media = Media(file)
+        media.parse_with_options(MediaParseFlag.fetch_local, -1)
+        self._prepared[key] = media
+        while len(self._prepared) > self.max_prepared:
+            del self._prepared[next(iter(self._prepared))]
+
     def pause(self, state: bool | None = None) -> bool:
         if state is None:
             state = self.media_list_player.is_playing()
@@ -75,17 +117,48 @@ class VLCPlayer(Player):
         return state
 
     def stop(self):
+        self._resume_at = None
         self.media_list_player.stop()
         self.clear()
 
     def add(self, file: PathLike | str, index: int | None = None) -> str:
-        media = Media(file)
+        # Prepared media are used only once, as a media can only be at one position of the playlist
+        media = self._prepared.pop(str(file), None) or Media(file)
         if index:
             self.media_list.insert_media(media, index)
         else:
             self.media_list.add_media(media)
+        self.timing.insert(index or None, self._duration_of(media))
         return media.get_mrl()
 
+    def _duration_of(self, media: Media) -> int:
+        """
+        Duration of a media if it is parsed, otherwise start parsing it and return -1
+        """
+        if media.get_parsed_status() == MediaParsedStatus.done:
+            return media.get_duration()
+        media.parse_with_options(MediaParseFlag.fetch_local, -1)
+        self._unparsed.append(media)
+        return -1
+
+    def _update_durations(self):
+        """
+        Take over the durations of media which were parsed since the last call
+        """
+        if not self._unparsed:
+            return
+        unparsed = []
+        for media in self._unparsed:
+            duration = media.get_duration()
+            # Parsed status 0: neither parsing nor playback has determined the duration yet
+            if duration < 0 and media.get_parsed_status().value == 0:
+                unparsed.append(media)
+                continue
+            index = self.media_list.index_of_item(media)
+            if index >= 0:
+                self.timing.set(index, duration)
+        self._unparsed = unparsed
+
     def remove(self, file_or_index: PathLike | str | int):
         if not isinstance(file_or_index, int):
             # TODO: check if the following line really works.
@@ -95,11 +168,27 @@ class VLCPlayer(Player):
                 return
         if file_or_index < 0:
             file_or_index = self.media_list.count() - file_or_index
-        self.media_list.remove_index(file_or_index)
+        if self.media_list.remove_index(file_or_index) == 0:
+            self.timing.remove(file_or_index)
 
     def clear(self):
         while self.media_list.remove_index(0) == 0:
             pass
+        self.timing.reset()
+        self._unparsed.clear()
+
+    def move(self, index: int, new_index: int):
+        self.media_list.lock()
+        try:
+            size = self.media_list.count()
+            if not (0 <= index < size and 0 <= new_index < size):
+                raise IndexError(f"Cannot move index {index} to {new_index} in a playlist of {size} files")
+            media = self.media_list.item_at_index(index)
+            self.media_list.remove_index(index)
+            self.media_list.insert_media(media, new_index)
+        finally:
+            self.media_list.unlock()
+        self.timing.move(index, new_index)
 
     def next(self):
         self.media_list_player.next()
@@ -148,14 +237,65 @@ class VLCPlayer(Player):
         return map(lambda m: m.get_mrl(), self._media_from_to(start, end))
 
     def durations_from_to(self, start: int, end: int) -> Iterator[int]:
-        for m in self._media_from_to(start, end):
-            if m.get_parsed_status() != MediaParsedStatus.done:
-                m.parse()
-            yield m.get_duration()
+        # Durations are taken from the timing instead of the media, -1 if they are not parsed yet
+        self._update_durations()
+        return iter(self.timing.durations[max(0, start):end + 1])
+
+    def remaining(self) -> int | None:
+        length = self.media_player.get_length()
+        if self.media is None or length <= 0:
+            return None
+        return max(0, length - max(self.media_player.get_time(), 0))
+
+    def start_time(self, index: int) -> int | None:
+        self._update_durations()
+        current = self.index()
+        if current is None:
+            return self.timing.start(index)
+        if index <= current:
+            return 0 if index == current else None
+        return (self.remaining() or 0) + self.timing.start(index) - self.timing.start(current + 1)
+
+    def restore(self, snapshot: Player.Snapshot):
+        self.stop()
+        # Add all items under a single lock instead of locking per item
+        self.media_list.lock()
+        try:
+            for identifier in snapshot.identifiers:
+                media = Media(identifier)
+                self.media_list.add_media(media)
+                self.timing.insert(None, self._duration_of(media))
+        finally:
+            self.media_list.unlock()
+        if snapshot.volume is not None:
+            self.volume(snapshot.volume)
+        if snapshot.index is None or snapshot.state not in (Player.State.PLAYING, Player.State.PAUSED):
+            return
+        if not 0 <= snapshot.index < len(snapshot.identifiers):
+            self._add_error(f"restore: No file at index {snapshot.index}")
+            return
+        # Pausing and seeking only take effect once the file is playing
+        self._resume_at = snapshot.position, snapshot.state == Player.State.PAUSED
+        self.media_list_player.play_item_at_index(snapshot.index)
+
+    def _resume(self, position: float, paused: bool):
+        if position:
+            self.media_player.set_position(position)
+        if paused:
+            self.media_list_player.set_pause(True)
 
     def size(self) -> int:
         return self.media_list.count()
 
-    async def on_event(self) -> AsyncIterator[Player.Event]:
-        async for event in self.async_events:
-            yield event[0][0]
+    def bind(self, loop=None):
+        self.async_events.bind(loop)
+
+    def oldest_event(self) -> int:
+        return self.async_events.oldest()
+
+    def latest_event(self) -> int:
+        return self.async_events.sequence
+
+    async def events(self, since: int | None = None) -> AsyncIterator[tuple[int, Player.Event, float]]:
+        async for sequence, event, timestamp in self.async_events.subscribe(since):
+            yield sequence, event[0][0], timestamp
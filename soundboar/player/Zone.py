@@ -0,0 +1,77 @@
+import re
+from os import PathLike
+
+from soundboar.player.CommandExecutor import CommandExecutor
+from soundboar.player.Player import Player
+from soundboar.player.PlayerStateStore import PlayerStateStore
+from soundboar.player.Prewarmer import Prewarmer
+from soundboar.repository.Repository import Repository
+from soundboar.repository.UsageStats import UsageStats
+
+DEFAULT_ZONE = "default"
+"""Name of the zone if no zones are configured"""
+
+ZONE_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def parse_zones(value: str) -> list[tuple[str, str | None]]:
+    """
+    Parse a zone configuration like `kitchen=hw:CARD=Kitchen,DEV=0;living`
+    :param value: Semicolon separated zone names, each optionally followed by `=` and the audio output device
+    :return: Names and audio output devices (None for the default device) of the zones
+    """
+    zones = []
+    for entry in filter(None, map(str.strip, value.split(";"))):
+        name, _, device = entry.partition("=")
+        name = name.strip()
+        if not ZONE_NAME.fullmatch(name):
+            raise ValueError(f"Invalid zone name {name!r}, only letters, digits, - and _ are allowed")
+        if name in (zone for zone, _ in zones):
+            raise ValueError(f"Zone {name} is configured twice")
+        zones.append((name, device.strip() or None))
+    if not zones:
+        raise ValueError("No zones configured")
+    return zones
+
+
+class Zone:
+    """
+    A named player with its own command executor, persisted state and prewarmer. Zones share the repository and
+    usage statistics, but their commands are executed independently, so a busy or hanging player does not delay the
+    others.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            player: Player,
+            state_path: PathLike | str,
+            repository: Repository,
+            usage: UsageStats
+    ):
+        """
+        :param name: Name of the zone
+        :param player: Player of the zone
+        :param state_path: File to persist the state of the player in
+        :param repository: Repository the files are played from
+        :param usage: Usage statistics to select the files to prewarm by
+        """
+        self.name = name
+        self.player = player
+        self.executor = CommandExecutor(name=f"soundboar-player-{name}")
+        self.state = PlayerStateStore(player, state_path, executor=self.executor)
+        self.prewarmer = Prewarmer(player, self.executor, repository, usage)
+
+    def open(self):
+        """
+        Restore the persisted state of the player and keep persisting it
+        """
+        self.state.restore()
+        self.state.attach()
+
+    def close(self):
+        """
+        Persist the state of the player and stop executing commands
+        """
+        self.state.save()
+        self.executor.shutdown()
@@ -1,2 +1,7 @@
 from soundboar.player.Player import Player
 from soundboar.player.VLCPlayer import VLCPlayer
+from soundboar.player.NullPlayer import NullPlayer
+from soundboar.player.PlayerStateStore import PlayerStateStore
+from soundboar.player.CommandExecutor import CommandExecutor, Priority
+from soundboar.player.Prewarmer import Prewarmer
+from soundboar.player.Zone import Zone
@@ -0,0 +1,28 @@
+from soundboar.player.CommandExecutor import Call
+from soundboar.player.Player import Player
+
+
+def is_paused(player: Player) -> bool:
+    """Command which leaves the player as it is, the result of a pause that was cancelled out"""
+    return player.state() == Player.State.PAUSED
+
+
+def combine_pause(player: Player, pending: Call, new: Call) -> Call:
+    """
+    Combine a pending pause command of a player with a new one, see `CommandExecutor.submit`
+    :param player: Player the pause commands are for
+    :param pending: Pending call, `player.pause` with the state to set (None to toggle) or `is_paused` if the pending
+        pause commands cancelled each other out
+    :param new: New call of `player.pause`
+    :return: A single call with the effect of the pending call followed by the new one
+    """
+    (pending_fn, pending_args), (_, (new_state,)) = pending, new
+    if new_state is not None:
+        return new
+    if pending_fn is is_paused:
+        return player.pause, (None,)
+    (pending_state,) = pending_args
+    if pending_state is None:
+        # Two toggles cancel each other out
+        return is_paused, (player,)
+    return player.pause, (not pending_state,)
@@ -0,0 +1,125 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterable, NamedTuple
+
+from fastapi import HTTPException
+
+from soundboar.logs import logger
+from soundboar.repository.Repository import Repository
+from soundboar.util import to_file_id
+from soundboar.util.audio import AudioInfo, check_audio_stream
+
+
+class ImportResult(NamedTuple):
+    name: str
+    """Name of the imported entry (file name or path in the archive)"""
+
+    info: tuple[str, str, Path] | None = None
+    """ID, name and path of the stored file if it was imported"""
+
+    error: str | None = None
+    """Why the entry could not be imported"""
+
+    audio: AudioInfo | None = None
+    """Audio format and header fields detected from the content"""
+
+
+class Importer:
+    """
+    Imports many files into a repository: entries are streamed to disk one at a time by a pool of workers, and the
+    catalog is committed once after all entries were processed.
+    """
+
+    def __init__(self, repository: Repository, workers: int = 4):
+        """
+        :param repository: Repository to import into
+        :param workers: Number of entries to write concurrently
+        """
+        self.repository = repository
+        self.workers = workers
+
+    def import_entries(
+            self,
+            entries: Iterable[tuple[str, Callable[[], BinaryIO]]],
+            prefix: str = ""
+    ) -> list[ImportResult]:
+        """
+        Import entries
+        :param entries: Names of the entries and functions opening their content
+        :param prefix: Prefix for the requested IDs of the entries
+        :return: Result for each entry in the order of the entries
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="soundboar-import") as pool:
+            results = list(pool.map(lambda entry: self._import(*entry, prefix=prefix), entries))
+        version = self.repository.commit(result.info for result in results if result.info is not None)
+        logger.info(f"Imported {sum(result.info is not None for result in results)}/{len(results)} files "
+                    f"(catalog version {version})")
+        return results
+
+    def import_files(self, files: Iterable[tuple[str, BinaryIO]], prefix: str = "") -> list[ImportResult]:
+        """
+        Import files, zip archives are imported entry by entry
+        :param files: Names and contents of the files
+        :param prefix: Prefix for the requested IDs of the entries
+        :return: Result for each file or archive entry
+        """
+        with ExitStack() as stack:
+            entries = []
+            # Results of archives which could not be opened, with the number of entries before them
+            failed: list[tuple[int, ImportResult]] = []
+            for name, file in files:
+                if name.lower().endswith(".zip"):
+                    try:
+                        archive = stack.enter_context(zipfile.ZipFile(file))
+                    except zipfile.BadZipFile as e:
+                        logger.warning(f"Could not import {name}: {e}")
+                        failed.append((len(entries), ImportResult(name, error=f"Invalid zip archive: {e}")))
+                        continue
+                    entries += self._zip_entries(archive)
+                else:
+                    entries.append((name, lambda f=file: f))
+            results = self.import_entries(entries, prefix)
+        for offset, (index, result) in enumerate(failed):
+            results.insert(index + offset, result)
+        return results
+
+    def import_zip(self, file: PathLike | str | BinaryIO, prefix: str = "") -> list[ImportResult]:
+        """
+        Import all entries of a zip archive
+        :param file: Path or content of the zip archive
+        :param prefix: Prefix for the requested IDs of the entries
+        :return: Result for each entry of the archive
+        """
+        with zipfile.ZipFile(file) as archive:
+            return self.import_entries(self._zip_entries(archive), prefix)
+
+    @staticmethod
+    def _zip_entries(archive: zipfile.ZipFile) -> list[tuple[str, Callable[[], BinaryIO]]]:
+        # Skip directories and macOS metadata
+        return [
+            (member.filename, lambda m=member: archive.open(m))
+            for member in archive.infolist()
+            if not member.is_dir()
+            and not member.filename.startswith("__MACOSX/")
+            and not PurePosixPath(member.filename).name.startswith("._")
+        ]
+
+    def _import(self, name: str, open_: Callable[[], BinaryIO], prefix: str = "") -> ImportResult:
+        try:
+            file_id = to_file_id(prefix + str(PurePosixPath(name).with_suffix("")), name,
+                                 self.repository.supported_file_types)
+            if file_id in self.repository.catalog:
+                return ImportResult(name, error=f"File {file_id} already exists")
+            with open_() as content:
+                audio, content = check_audio_stream(content, Path(file_id).suffix)
+                return ImportResult(name, self.repository.store(content, file_id), audio=audio)
+        except HTTPException as e:
+            return ImportResult(name, error=e.detail)
+        except FileExistsError:
+            return ImportResult(name, error=f"File {file_id} already exists")
+        except Exception as e:
+            logger.warning(f"Could not import {name}: {e}")
+            return ImportResult(name, error=str(e))
@@ -1,17 +1,135 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from enum import StrEnum
 from os import PathLike
 from pathlib import Path
-from typing import Iterator, BinaryIO, Iterable
+from typing import Iterator, BinaryIO, Iterable, NamedTuple
+
+from soundboar.logs import logger
+from soundboar.repository.SearchIndex import SearchIndex
+
+
+class ChangeType(StrEnum):
+    """
+    Types of changes to the repositories catalog
+    """
+
+    ADDED = "added"
+    REMOVED = "removed"
+    RENAMED = "renamed"
+
+
+class Change(NamedTuple):
+    version: int
+    """Catalog version this change resulted in"""
+
+    type: ChangeType
+    """Type of the change"""
+
+    identifier: str
+    """Identifier of the changed file (the new one if it was renamed)"""
+
+    previous_identifier: str | None = None
+    """Previous identifier of a renamed file"""
+
+
+class Root(NamedTuple):
+    path: Path
+    """Directory containing the files"""
+
+    namespace: str = ""
+    """If set, identifiers of the files in this root are prefixed with `<namespace>/`"""
+
+    priority: int = 0
+    """Files of roots with a higher priority shadow files with the same identifier in roots with a lower priority"""
+
+    writable: bool = True
+    """Whether files may be written, renamed and deleted in this root"""
+
+
+def parse_roots(value: str, base: PathLike | str = ".") -> list[Root]:
+    """
+    Parse a root configuration like `sounds;/mnt/usb,namespace=usb,priority=-1,readonly`
+    :param value: Semicolon separated roots, each a path followed by comma separated options: `namespace=<name>`,
+        `priority=<number>` and `readonly`
+    :param base: Directory relative paths are resolved against
+    :return: The configured roots
+    """
+    roots = []
+    for entry in filter(None, map(str.strip, value.split(";"))):
+        path, *options = map(str.strip, entry.split(","))
+        root = Root(Path(base) / path)
+        for option in options:
+            key, _, option_value = option.partition("=")
+            if key == "namespace":
+                root = root._replace(namespace=option_value.strip("/"))
+            elif key == "priority":
+                root = root._replace(priority=int(option_value))
+            elif key == "readonly":
+                root = root._replace(writable=False)
+            else:
+                raise ValueError(f"Unknown root option {key}")
+        roots.append(root)
+    if not roots:
+        raise ValueError("No roots configured")
+    return roots
 
 
 class Repository:
-    root: Path = None
+    """
+    Union of the files in one or more root directories. Roots are scanned in parallel, files of roots with a higher
+    priority shadow files with the same identifier in roots with a lower priority. New files are written to the root
+    of their namespace, or to the highest priority writable root without namespace.
+    """
+
+    roots: list[Root] = None
+    write_root: Root | None = None
     supported_file_types: set[str] = None
+    index: SearchIndex = None
+    catalog: dict[str, tuple[str, str, Path]] = None
+    version: int = None
+    """Catalog version, increases with every change and starts with the current time in ms so that it also increases
+    across restarts"""
 
-    def __init__(self, directory: PathLike, supported_files: Iterable[str]):
-        self.root = Path(directory)
+    def __init__(
+            self,
+            roots: PathLike | str | Iterable[PathLike | str | Root],
+            supported_files: Iterable[str],
+            max_changes: int = 10_000,
+            workers: int = 8
+    ):
+        """
+        :param roots: Root directory of the repository, or several roots (directories or Root)
+        :param supported_files: Supported file suffixes
+        :param max_changes: Number of changes to keep for changes_since()
+        :param workers: Number of directories to scan concurrently
+        """
+        if isinstance(roots, (str, PathLike)):
+            roots = [roots]
+        roots = [root if isinstance(root, Root) else Root(Path(root)) for root in roots]
+        # Stable sort: roots with the same priority keep their order
+        self.roots = sorted(roots, key=lambda root: -root.priority)
+        namespaces = [root.namespace for root in self.roots if root.namespace]
+        if len(namespaces) != len(set(namespaces)):
+            raise ValueError(f"Namespaces of roots must be unique: {', '.join(namespaces)}")
+        if not any(root.path.is_dir() for root in self.roots):
+            raise ValueError(f"No valid directory: {', '.join(str(root.path) for root in self.roots)}")
+        unnamespaced = [root for root in self.roots if not root.namespace]
+        self.write_root = next((root for root in unnamespaced if root.writable), next(iter(unnamespaced), None))
         self.supported_file_types = set(supported_files)
-        if not self.root.is_dir():
-            raise ValueError(f"Path is no valid directory: {directory}")
+        self.workers = workers
+        self.catalog = {info[0]: info for info in self.scan()}
+        self.index = SearchIndex()
+        self.index.add_all((identifier, name) for identifier, name, _ in self.catalog.values())
+        self.version = time.time_ns() // 1_000_000
+        self._changes: deque[Change] = deque(maxlen=max_changes)
+        self._changes_start = self.version
+        self._lock = threading.RLock()
 
     def file(self, identifier: str) -> Path:
         """
@@ -19,7 +137,7 @@ class Repository:
         :param identifier: Identifier of the file to retrieve
         :return: File path
         """
-        return self.root / identifier
+        return self._locate(identifier)[1]
 
     def file_position(self, identifier: str) -> int:
         """
@@ -27,12 +145,10 @@ class Repository:
         :param identifier: Identifier of the file
         :return: File position/index
         """
-        i = 0
-        for (file, *_) in self.all():
-            if file == identifier:
-                return i
-            i += 1
-        raise FileNotFoundError(f"File {identifier} does not exist")
+        try:
+            return list(self.catalog).index(identifier)
+        except ValueError:
+            raise FileNotFoundError(f"File {identifier} does not exist")
 
     def file_info(self, identifier: str) -> tuple[str, str, Path]:
         """
@@ -48,19 +164,258 @@ class Repository:
         Get the IDs, names and paths of all files in the repository
         :return: Tuples of ID, name and path
         """
-        for file_type in self.supported_file_types:
-            for file in self.root.rglob("*" + file_type):
-                f = file.relative_to(self.root)
-                yield self.file_info(str(f))
+        return iter(list(self.catalog.values()))
+
+    def snapshot(self) -> tuple[int, list[tuple[str, str, Path]]]:
+        """
+        Get the IDs, names and paths of all files together with the catalog version they belong to
+        :return: Catalog version and tuples of ID, name and path
+        """
+        with self._lock:
+            return self.version, list(self.catalog.values())
+
+    def scan(self) -> Iterator[tuple[str, str, Path]]:
+        """
+        Scan the file system for the IDs, names and paths of all files in the repository. All roots and their top
+        level directories are scanned concurrently, so a slow root does not delay the others.
+        :return: Tuples of ID, name and path
+        """
+        scanned: dict[Root, list[tuple[str, str, Path]]] = {root: [] for root in self.roots}
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="soundboar-scan") as pool:
+            pending: dict[Future, Root] = {
+                pool.submit(self._scan_directory, root, root.path, False): root
+                for root in self.roots
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    root = pending.pop(future)
+                    infos, directories = future.result()
+                    scanned[root].extend(infos)
+                    for directory in directories:
+                        pending[pool.submit(self._scan_directory, root, directory, True)] = root
+        seen = set()
+        for root in self.roots:
+            for info in sorted(scanned[root]):
+                if info[0] not in seen:
+                    seen.add(info[0])
+                    yield info
+
+    def _scan_directory(
+            self,
+            root: Root,
+            directory: Path,
+            recursive: bool
+    ) -> tuple[list[tuple[str, str, Path]], list[Path]]:
+        """
+        Scan a directory of a root
+        :return: ID, name and path of the files found, and the subdirectories which were not scanned
+        """
+        if not recursive and not directory.is_dir():
+            logger.warning(f"Root {directory} is not a directory, skipping it")
+            return [], []
+        infos, directories = [], []
+        if recursive:
+            for parent, _, files in os.walk(directory):
+                infos.extend(self._scanned_file(root, Path(parent, file)) for file in files)
+        else:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        directories.append(Path(entry.path))
+                    else:
+                        infos.append(self._scanned_file(root, Path(entry.path)))
+        return [info for info in infos if info is not None], directories
+
+    def _scanned_file(self, root: Root, file: Path) -> tuple[str, str, Path] | None:
+        if file.suffix not in self.supported_file_types:
+            return None
+        identifier = str(file.relative_to(root.path))
+        if root.namespace:
+            identifier = f"{root.namespace}/{identifier}"
+        return identifier, file.stem, file
+
+    def _locate(self, identifier: str) -> tuple[Root, Path]:
+        """
+        Get the root and path of a file, for new files the root the file is to be written to
+        """
+        info = self.catalog.get(identifier) if self.catalog is not None else None
+        if info is not None:
+            path = info[2]
+            roots = (root for root in self.roots if path.is_relative_to(root.path))
+            return max(roots, key=lambda root: len(root.path.parts)), path
+        for root in self.roots:
+            if root.namespace and identifier.startswith(root.namespace + "/"):
+                relative = identifier[len(root.namespace) + 1:]
+                break
+        else:
+            if self.write_root is None:
+                raise FileNotFoundError(f"No root for file {identifier}")
+            root, relative = self.write_root, identifier
+        try:
+            return root, self._join(root, relative)
+        except ValueError as e:
+            raise FileNotFoundError(str(e))
+
+    @staticmethod
+    def _join(root: Root, relative: str) -> Path:
+        """
+        Path of a file in a root
+        :raise ValueError: If the path is outside the root, e.g. because it contains `..`
+        """
+        path = root.path / relative
+        if not path.resolve().is_relative_to(root.path.resolve()):
+            raise ValueError(f"File {relative} is outside of root {root.path}")
+        return path
+
+    @property
+    def namespaces(self) -> set[str]:
+        """Namespaces of all roots which have one"""
+        return {root.namespace for root in self.roots if root.namespace}
+
+    @staticmethod
+    def _check_writable(root: Root):
+        if not root.writable:
+            raise PermissionError(f"Root {root.path} is read-only")
+
+    def refresh(self) -> int:
+        """
+        Rescan the file system and record files which were added or removed outside of this repository
+        :return: The new catalog version
+        """
+        with self._lock:
+            scanned = {info[0]: info for info in self.scan()}
+            for identifier in [identifier for identifier in self.catalog if identifier not in scanned]:
+                self._remove(identifier)
+            for identifier, info in scanned.items():
+                # A changed path means that a shadowing file was added or removed in another root
+                if identifier not in self.catalog or self.catalog[identifier][2] != info[2]:
+                    self._add(info)
+            return self.version
+
+    def changes_since(self, version: int) -> list[Change] | None:
+        """
+        Get all changes to the catalog after the given version
+        :param version: Catalog version the client knows
+        :return: Changes in the order they happened, None if they are not known (anymore) and all files have to be
+            fetched again
+        """
+        with self._lock:
+            if version < self._changes_start or version > self.version:
+                return None
+            return [change for change in self._changes if change.version > version]
+
+    def search(self, query: str, limit: int = 20, prefix: bool = False) -> list[tuple[str, str, Path]]:
+        """
+        Search files by their name and path
+        :param query: Text to search for
+        :param limit: Maximum number of results
+        :param prefix: Only match files whose name or path start with the query instead of fuzzy matching
+        :return: Tuples of ID, name and path, best match first
+        """
+        # The index is changed by writes on other threads
+        with self._lock:
+            if prefix:
+                identifiers = self.index.prefix(query, limit)
+            else:
+                identifiers = [identifier for identifier, _ in self.index.search(query, limit)]
+        return [self.file_info(identifier) for identifier in identifiers]
 
     async def write(self, file: BinaryIO, identifier: str):
-        # TODO: make async
-        with open(self.root / identifier, mode="xb") as f:
+        info = await asyncio.to_thread(self.store, file, identifier)
+        with self._lock:
+            return self._add(info)
+
+    def store(self, file: BinaryIO, identifier: str) -> tuple[str, str, Path]:
+        """
+        Stream a file to disk without adding it to the catalog, see commit()
+        :param file: File contents, read from the start if seekable
+        :param identifier: Identifier of the new file
+        :return: ID, name and path of the stored file
+        """
+        root, path = self._locate(identifier)
+        self._check_writable(root)
+        if file.seekable():
             file.seek(0)
-            f.write(file.read())
-        return self.file_info(identifier)
+        try:
+            with open(path, mode="xb") as f:
+                shutil.copyfileobj(file, f)
+        except FileExistsError:
+            raise
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return identifier, path.stem, path
+
+    def commit(self, infos: Iterable[tuple[str, str, Path]]) -> int:
+        """
+        Add many stored files to the catalog at once, sharing a single catalog version
+        :param infos: ID, name and path of the files as returned by store()
+        :return: The new catalog version
+        """
+        infos = list(infos)
+        if not infos:
+            return self.version
+        with self._lock:
+            self.version += 1
+            for info in infos:
+                self.catalog[info[0]] = info
+                self._log(Change(self.version, ChangeType.ADDED, info[0]))
+            self.index.add_all((identifier, name) for identifier, name, _ in infos)
+            return self.version
+
+    def rename(self, identifier: str, new_identifier: str) -> tuple[str, str, Path]:
+        """
+        Rename a file, the file stays in its root (and namespace)
+        :param identifier: Current identifier of the file
+        :param new_identifier: New identifier of the file
+        :return: ID, name and path of the renamed file
+        """
+        root, file = self._locate(identifier)
+        self._check_writable(root)
+        relative = new_identifier
+        if root.namespace:
+            relative = new_identifier.removeprefix(root.namespace + "/")
+            new_identifier = f"{root.namespace}/{relative}"
+        new_file = self._join(root, relative)
+        if new_identifier in self.catalog or new_file.exists():
+            raise FileExistsError(f"File {new_identifier} already exists")
+        new_file.parent.mkdir(parents=True, exist_ok=True)
+        file.rename(new_file)
+        with self._lock:
+            del self.catalog[identifier]
+            self.index.remove(identifier)
+            info = new_identifier, new_file.stem, new_file
+            self.catalog[new_identifier] = info
+            self.index.add(new_identifier, info[1])
+            self._record(ChangeType.RENAMED, new_identifier, identifier)
+            return info
 
     def delete(self, identifier: str):
-        file = self.file(identifier)
+        root, file = self._locate(identifier)
+        self._check_writable(root)
         if file.is_file():
             file.unlink(missing_ok=True)
+        with self._lock:
+            if identifier in self.catalog:
+                self._remove(identifier)
+
+    def _add(self, info: tuple[str, str, Path]) -> tuple[str, str, Path]:
+        self.catalog[info[0]] = info
+        self.index.add(info[0], info[1])
+        self._record(ChangeType.ADDED, info[0])
+        return info
+
+    def _remove(self, identifier: str):
+        del self.catalog[identifier]
+        self.index.remove(identifier)
+        self._record(ChangeType.REMOVED, identifier)
+
+    def _record(self, change_type: ChangeType, identifier: str, previous_identifier: str | None = None):
+        self.version += 1
+        self._log(Change(self.version, change_type, identifier, previous_identifier))
+
+    def _log(self, change: Change):
+        if len(self._changes) == self._changes.maxlen:
+            self._changes_start = self._changes[0].version
+        self._changes.append(change)
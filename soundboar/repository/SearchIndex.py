@@ -0,0 +1,169 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Iterable
+
+_SEPARATORS = re.compile(r'[\s/\\_\-.]+')
+_SUFFIX = re.compile(r'\.[^\s/\\.]+$')
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize a text for indexing and querying: lower case with all separators replaced by a single space
+    """
+    return _SEPARATORS.sub(" ", text.lower()).strip()
+
+
+def strip_suffix(identifier: str) -> str:
+    """
+    Remove the file extension from an identifier, it is shared by large parts of a library and does not help to find
+    a file
+    """
+    return _SUFFIX.sub("", identifier)
+
+
+def ngrams(text: str, n: int = 3) -> set[str]:
+    """
+    Get the n-grams of a normalized text, padded so that short texts and word starts produce n-grams as well
+    """
+    padded = " " + text + " "
+    if len(padded) < n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class SearchIndex:
+    """
+    Incrementally updatable n-gram index for fuzzy and prefix search over identifiers and names.
+    """
+
+    def __init__(self, n: int = 3, min_similarity: float = .3, max_posting: int = 2000):
+        """
+        :param n: Length of the n-grams
+        :param min_similarity: Minimum fraction of the query's n-grams an entry has to contain to be a fuzzy match
+        :param max_posting: n-grams contained in more entries than this are too common to find candidates by, they
+            only count towards the similarity of candidates found by rarer n-grams
+        """
+        self.n = n
+        self.min_similarity = min_similarity
+        self.max_posting = max_posting
+        self._postings: dict[str, set[str]] = {}
+        self._entries: dict[str, tuple[str, frozenset[str], tuple[str, ...]]] = {}
+        self._keys: list[tuple[str, str]] = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, identifier: str):
+        return identifier in self._entries
+
+    def add(self, identifier: str, name: str):
+        """
+        Add or replace an entry
+        :param identifier: Identifier (relative path) of the entry
+        :param name: Display name of the entry
+        """
+        for key in self._add(identifier, name):
+            insort(self._keys, (key, identifier))
+
+    def add_all(self, entries: Iterable[tuple[str, str]]):
+        """
+        Add or replace many entries at once, sorting the prefix keys only once
+        :param entries: Identifiers and names of the entries
+        """
+        for identifier, name in entries:
+            self._keys.extend((key, identifier) for key in self._add(identifier, name))
+        self._keys.sort()
+
+    def _add(self, identifier: str, name: str) -> tuple[str, ...]:
+        if identifier in self._entries:
+            self.remove(identifier)
+        text = normalize(strip_suffix(identifier))
+        grams = frozenset(ngrams(text, self.n))
+        keys = tuple({name.lower(), identifier.lower()})
+        self._entries[identifier] = (normalize(name), grams, keys)
+        postings = self._postings
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = {identifier}
+            else:
+                posting.add(identifier)
+        return keys
+
+    def remove(self, identifier: str):
+        """
+        Remove an entry if it exists
+        :param identifier: Identifier of the entry
+        """
+        entry = self._entries.pop(identifier, None)
+        if entry is None:
+            return
+        _, grams, keys = entry
+        for gram in grams:
+            posting = self._postings[gram]
+            posting.discard(identifier)
+            if not posting:
+                del self._postings[gram]
+        for key in keys:
+            i = bisect_left(self._keys, (key, identifier))
+            if i < len(self._keys) and self._keys[i] == (key, identifier):
+                del self._keys[i]
+
+    def prefix(self, query: str, limit: int = 20) -> list[str]:
+        """
+        Get entries whose name or identifier start with the query, in lexicographical order
+        :param query: Prefix to search for
+        :param limit: Maximum number of results
+        :return: Identifiers of the matching entries
+        """
+        query = query.lower()
+        results = []
+        for i in range(bisect_left(self._keys, (query,)), len(self._keys)):
+            key, identifier = self._keys[i]
+            if len(results) >= limit or not key.startswith(query):
+                break
+            if identifier not in results:
+                results.append(identifier)
+        return results
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[str, float]]:
+        """
+        Fuzzy search ranked by n-gram similarity, exact substring and word-prefix matches of the name rank higher.
+        Queries too short to form an n-gram or made up of common n-grams only match entries starting with them.
+        :param query: Text to search for
+        :param limit: Maximum number of results
+        :return: Identifiers of the matching entries with their score, best match first
+        """
+        text = normalize(query)
+        if not text:
+            return []
+        grams = ngrams(text, self.n)
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        # An entry containing at least `required` query n-grams must be contained in one of the
+        # `len(grams) - required + 1` rarest postings, so only these have to be scanned for candidates
+        required = max(1, math.ceil(len(grams) * self.min_similarity))
+        scanned = [posting for posting in postings[:len(grams) - required + 1] if len(posting) <= self.max_posting]
+        if len(text) < self.n - 1 or not scanned:
+            return self._rank(text, grams, self.prefix(query.strip(), limit), limit)
+        hits = Counter()
+        for posting in scanned:
+            hits.update(posting)
+        for posting in postings[len(scanned):]:
+            for identifier in hits:
+                if identifier in posting:
+                    hits[identifier] += 1
+        return self._rank(text, grams, (identifier for identifier, count in hits.items() if count >= required), limit)
+
+    def _rank(self, text: str, grams: set[str], identifiers: Iterable[str], limit: int) -> list[tuple[str, float]]:
+        scored = []
+        for identifier in identifiers:
+            name, entry_grams, _ = self._entries[identifier]
+            count = len(grams & entry_grams)
+            score = count / (len(grams) + len(entry_grams) - count)
+            if text in name:
+                score += 1. if (" " + name).find(" " + text) >= 0 else .5
+            scored.append((score, identifier))
+        return [(identifier, score) for score, identifier in heapq.nlargest(limit, scored)]
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Callable
+
+from soundboar.logs import logger
+
+
+class UsageStats:
+    """
+    Play counts and last play times per file identifier, persisted to a JSON file
+    """
+
+    def __init__(
+            self,
+            path: PathLike | str,
+            half_life: float = 7 * 24 * 3600,
+            keep: Callable[[str], bool] | None = None
+    ):
+        """
+        :param path: File to store the statistics in
+        :param half_life: Seconds after which a play only counts half when ranking files
+        :param keep: Whether to keep the statistics of an identifier, the others (e.g. of deleted files) are dropped
+            when saving. All are kept if None
+        """
+        self.path = Path(path)
+        self.half_life = half_life
+        self.keep = keep
+        self.counts: dict[str, int] = {}
+        self.last_played: dict[str, float] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def record(self, identifier: str):
+        """
+        Record a play of a file
+        :param identifier: Identifier of the file
+        """
+        with self._lock:
+            self.counts[identifier] = self.counts.get(identifier, 0) + 1
+            self.last_played[identifier] = time.time()
+            self.dirty = True
+
+    def top(self, n: int | None = None) -> list[str]:
+        """
+        Get the most used files: play counts decay with the time since the file was last played
+        :param n: Number of files, all if None
+        :return: Identifiers of the most used files, most used first
+        """
+        now = time.time()
+        with self._lock:
+            scores = {
+                identifier: count * 0.5 ** ((now - self.last_played[identifier]) / self.half_life)
+                for identifier, count in self.counts.items()
+            }
+        return sorted(scores, key=scores.get, reverse=True)[:n]
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            with self._lock:
+                self.counts = {identifier: int(count) for identifier, count in data["counts"].items()}
+                self.last_played = {identifier: float(last) for identifier, last in data["last_played"].items()}
+                self.dirty = False
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid usage statistics in {self.path}: {e}")
+
+    def save(self, force: bool = False):
+        """
+        Save the statistics atomically if they changed since they were last saved
+        :param force: Save even if nothing changed
+        """
+        with self._lock:
+            if self.keep is not None:
+                self._prune()
+            if not self.dirty and not force:
+                return
+            data = {"counts": dict(self.counts), "last_played": dict(self.last_played)}
+            self.dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _prune(self):
+        removed = [identifier for identifier in self.counts if not self.keep(identifier)]
+        for identifier in removed:
+            del self.counts[identifier]
+            self.last_played.pop(identifier, None)
+        if removed:
+            self.dirty = True
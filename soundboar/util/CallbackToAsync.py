@@ -1,39 +1,106 @@
 # Adapted from https://github.com/multimeric/Asynchronize/blob/master/asynchronize/__init__.py
 import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator
 
 
 class MakeAsync:
-    def __init__(self):
-        self.queue = asyncio.Queue()
+    """
+    Bridges callbacks from foreign threads to asyncio: every call to event() is appended to a bounded log with a
+    monotonically increasing sequence number and its time, which any number of subscribers can iterate and resume
+    from.
+    """
+
+    def __init__(self, max_events: int = 1024):
+        """
+        :param max_events: Number of events kept for replay, older ones are dropped
+        """
+        self.events: deque[tuple[int, Any, float]] = deque(maxlen=max_events)
+        # Start with the current time in ms so that sequence numbers also increase across restarts
+        self.sequence = time.time_ns() // 1_000_000
         self.finished = False
-        self.loop = asyncio.get_event_loop()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._waiters: set[asyncio.Future] = set()
+
+    def bind(self, loop: asyncio.AbstractEventLoop | None = None):
+        """
+        Bind to the event loop subscribers run in, defaults to the running loop. Events are logged before, but
+        subscribers are only woken up once bound.
+        """
+        self.loop = loop or asyncio.get_running_loop()
 
     def event(self, *args, **kwargs):
-        # Whenever a step is called, add to the queue but don't set finished to True, so __anext__ will continue
-        args = (args, kwargs)
+        # Whenever a step is called, append it to the log, this may be called from any thread
+        with self._lock:
+            self.sequence += 1
+            self.events.append((self.sequence, (args, kwargs), time.time()))
+        self._wake_up()
+
+    def finish(self):
+        self.finished = True
+        self._wake_up()
 
+    def _wake_up(self):
+        if self.loop is None or self.loop.is_closed():
+            return
         # We have to use the threadsafe call so that it wakes up the event loop, in case it's sleeping:
         # https://stackoverflow.com/a/49912853/2148718
-        self.loop.call_soon_threadsafe(
-            self.queue.put_nowait,
-            args
-        )
+        self.loop.call_soon_threadsafe(self._notify)
 
-    def finish(self):
-        self.finished = True
+    def _notify(self):
+        waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
 
-    def __await__(self):
-        # Since this implements __anext__, this can return itself
-        return self.queue.get().__await__()
+    def oldest(self) -> int:
+        """
+        Sequence number of the oldest event which can still be replayed
+        """
+        with self._lock:
+            return self.events[0][0] if self.events else self.sequence + 1
 
-    def __aiter__(self):
-        # Since this implements __anext__, this can return itself
-        return self
+    def replay(self, since: int) -> list[tuple[int, Any, float]]:
+        """
+        Get all logged events after the given sequence number
+        :param since: Sequence number of the last event known
+        :return: Sequence numbers, events and their times
+        """
+        with self._lock:
+            if not self.events or self.events[-1][0] <= since:
+                return []
+            # Sequence numbers are consecutive, so the position of an event in the log can be computed
+            start = max(0, since + 1 - self.events[0][0])
+            return [self.events[i] for i in range(start, len(self.events))]
 
-    async def __anext__(self):
-        # Keep waiting for the queue if a) we haven't finished, or b) if the queue is still full. This lets us finish
-        # processing the remaining items even after we've finished
-        if self.finished and self.queue.empty():
-            raise StopAsyncIteration
+    async def subscribe(self, since: int | None = None) -> AsyncIterator[tuple[int, Any, float]]:
+        """
+        Iterate over all events after the given sequence number, waiting for new ones
+        :param since: Sequence number of the last event known, only new events if None
+        :return: Sequence numbers, events and their times (seconds since the epoch)
+        """
+        if self.loop is None:
+            self.bind()
+        if since is None:
+            since = self.sequence
+        while True:
+            events = self.replay(since)
+            if not events:
+                if self.finished:
+                    return
+                waiter = self.loop.create_future()
+                self._waiters.add(waiter)
+                # Check again, an event could have been logged in between. Sequence numbers from the future (e.g. after
+                # the clock went backwards) wait until they are reached instead of spinning
+                if self.sequence <= since and not self.finished:
+                    await waiter
+                continue
+            for event in events:
+                yield event
+            since = events[-1][0]
 
-        return await self.queue.get()
+    def __aiter__(self):
+        return aiter(self.subscribe())
@@ -8,6 +8,8 @@ import requests
 from bs4 import BeautifulSoup
 from fastapi import HTTPException
 
+SUPPORTED_FILES = frozenset({".mp3", ".ogg", ".wav", ".flac"})
+
 
 async def extract_meta(url, *meta_tags: str) -> dict[str, str | None] | None:
     try:
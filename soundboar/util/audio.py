@@ -0,0 +1,148 @@
+import http.client
+import io
+import struct
+from typing import BinaryIO, NamedTuple
+
+from fastapi import HTTPException
+
+HEADER_SIZE = 16 * 1024
+"""Number of leading bytes which are inspected to detect the audio format"""
+
+SUFFIX_FORMATS = {".wav": "wav", ".flac": "flac", ".ogg": "ogg", ".mp3": "mp3"}
+
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),  # MPEG 2.5
+}
+
+
+class AudioInfo(NamedTuple):
+    format: str
+    """Detected format: wav, flac, ogg or mp3"""
+
+    sample_rate: int | None = None
+    """Sample rate in Hz, if it could be read from the header"""
+
+    channels: int | None = None
+    """Number of channels, if it could be read from the header"""
+
+
+def sniff(header: bytes) -> AudioInfo | None:
+    """
+    Detect the audio format from the leading bytes of a file
+    :param header: Leading bytes of the file
+    :return: Detected format and header fields, None if it is no supported audio file
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return _sniff_wav(header)
+    if header[:4] == b"fLaC":
+        return _sniff_flac(header)
+    if header[:4] == b"OggS":
+        return _sniff_ogg(header)
+    if header[:3] == b"ID3" and len(header) >= 10:
+        # Skip the ID3v2 tag, its size is stored as a syncsafe integer
+        size = (header[6] & 0x7f) << 21 | (header[7] & 0x7f) << 14 | (header[8] & 0x7f) << 7 | header[9] & 0x7f
+        offset = 10 + size + (10 if header[5] & 0x10 else 0)
+        return _sniff_mpeg(header, offset) or AudioInfo("mp3")
+    return _sniff_mpeg(header, len(header) - len(header.lstrip(b"\0")))
+
+
+def _sniff_wav(header: bytes) -> AudioInfo:
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id, size = struct.unpack_from("<4sI", header, offset)
+        if chunk_id == b"fmt " and offset + 16 <= len(header):
+            channels, sample_rate = struct.unpack_from("<HI", header, offset + 10)
+            return AudioInfo("wav", sample_rate, channels)
+        offset += 8 + size + size % 2
+    return AudioInfo("wav")
+
+
+def _sniff_flac(header: bytes) -> AudioInfo:
+    # The first metadata block is always STREAMINFO, the sample rate (20 bits) and channels (3 bits) follow the
+    # 4 byte block header and the 10 bytes of block and frame sizes
+    if len(header) < 21:
+        return AudioInfo("flac")
+    sample_rate = header[18] << 12 | header[19] << 4 | header[20] >> 4
+    channels = (header[20] >> 1 & 0x07) + 1
+    return AudioInfo("flac", sample_rate, channels)
+
+
+def _sniff_ogg(header: bytes) -> AudioInfo:
+    if len(header) < 27:
+        return AudioInfo("ogg")
+    packet = header[27 + header[26]:]
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        channels, sample_rate = struct.unpack_from("<BI", packet, 11)
+        return AudioInfo("ogg", sample_rate, channels)
+    if packet[:8] == b"OpusHead" and len(packet) >= 16:
+        channels, sample_rate = struct.unpack_from("<B2xI", packet, 9)
+        return AudioInfo("ogg", sample_rate, channels)
+    return AudioInfo("ogg")
+
+
+def _sniff_mpeg(header: bytes, offset: int) -> AudioInfo | None:
+    if offset + 4 > len(header):
+        return None
+    b1, b2, b3 = header[offset + 1:offset + 4]
+    if header[offset] != 0xff or b1 & 0xe0 != 0xe0:
+        return None
+    version = b1 >> 3 & 0x03
+    layer = b1 >> 1 & 0x03
+    rate_index = b2 >> 2 & 0x03
+    if version == 1 or layer == 0 or rate_index == 3 or b2 >> 4 == 0x0f:
+        return None
+    return AudioInfo("mp3", _MPEG_SAMPLE_RATES[version][rate_index], 1 if b3 >> 6 == 3 else 2)
+
+
+def check_audio(header: bytes, suffix: str) -> AudioInfo:
+    """
+    Check that the leading bytes of a file match the audio format claimed by its suffix
+    :param header: Leading bytes of the file
+    :param suffix: Suffix of the file
+    :return: Detected format and header fields
+    """
+    info = sniff(header)
+    if info is None:
+        raise HTTPException(http.client.BAD_REQUEST, "File content is not a supported audio file.")
+    if SUFFIX_FORMATS.get(suffix.lower()) != info.format:
+        raise HTTPException(http.client.BAD_REQUEST, f"File content is {info.format} but file type is {suffix}.")
+    return info
+
+
+class _PrefixedStream(io.RawIOBase):
+    """
+    Stream which first returns already read leading bytes and afterward the rest of the wrapped stream
+    """
+
+    def __init__(self, head: bytes, file: BinaryIO):
+        self._head = head
+        self._file = file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._head:
+            data, self._head = self._head[:len(buffer)], self._head[len(buffer):]
+        else:
+            data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def check_audio_stream(file: BinaryIO, suffix: str) -> tuple[AudioInfo, BinaryIO]:
+    """
+    Read the leading bytes of a stream and check them with check_audio() before anything else is read
+    :param file: Stream to check
+    :param suffix: Suffix of the file
+    :return: Detected format and header fields and a stream returning the complete content
+    """
+    head = b""
+    while len(head) < HEADER_SIZE:
+        data = file.read(HEADER_SIZE - len(head))
+        if not data:
+            break
+        head += data
+    return check_audio(head, suffix), _PrefixedStream(head, file)
@@ -15,6 +15,14 @@ class Var(StrEnum):
     HOST = "HOST"
     PORT = "PORT"
     CORS_ORIGIN = "CORS_ORIGIN"
+    PROFILE = "PROFILE"
+    PLAYER = "PLAYER"
+    ZONES = "ZONES"
+    ROOTS = "ROOTS"
+    LOG_QUEUE = "LOG_QUEUE"
+    LOG_JSON = "LOG_JSON"
+    LOG_SAMPLING = "LOG_SAMPLING"
+    LOG_RATE_LIMIT = "LOG_RATE_LIMIT"
 
 
 def get(
@@ -0,0 +1,166 @@
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from os import PathLike
+from pathlib import Path
+
+from soundboar.logs import logger
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the Python stacks of all threads of the process (request handlers, the threadpool, and the
+    libvlc callback thread feeding `MakeAsync`) and aggregates them as collapsed stacks.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        :param interval: Seconds between two samples
+        """
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.samples = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="soundboar-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        if not self.running:
+            return self.samples
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():  # noqa
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: PathLike | str):
+        """
+        Write the samples in the collapsed stack format (as consumed by flamegraph.pl or speedscope)
+        :param path: File to write the samples to
+        """
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class EndpointTimings:
+    """
+    Aggregated wall-clock timings of the API endpoints
+    """
+
+    def __init__(self):
+        self.timings: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            timing = self.timings.setdefault(endpoint, {"count": 0, "total": 0., "max": 0.})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                endpoint: timing | {"mean": timing["total"] / timing["count"]}
+                for endpoint, timing in self.timings.items()
+            }
+
+    def dump(self, path: PathLike | str):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class Profiler:
+    """
+    Runtime-toggleable profiler combining stack sampling and per-endpoint timings.
+    Stopping the profiler writes its results into the given directory.
+    """
+
+    def __init__(self, directory: PathLike | str, interval: float = 0.005):
+        self.directory = Path(directory)
+        self.sampler = SamplingProfiler(interval)
+        self.timings = EndpointTimings()
+        self.started: datetime | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.started is not None
+
+    def start(self):
+        if self.enabled:
+            return
+        self.timings.reset()
+        self.sampler.start()
+        self.started = datetime.now()
+        logger.info("Profiling started")
+
+    def stop(self) -> list[Path]:
+        """
+        Stop profiling and dump the results
+        :return: Paths of the written files
+        """
+        if not self.enabled:
+            return []
+        self.sampler.stop()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = self.started.strftime("%Y%m%d-%H%M%S")
+        self.started = None
+        stacks = self.directory / f"profile-{name}.collapsed"
+        timings = self.directory / f"timings-{name}.json"
+        self.sampler.dump(stacks)
+        self.timings.dump(timings)
+        logger.info(f"Profiling stopped, results written to {self.directory}")
+        return [stacks, timings]
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware recording the handling time of each HTTP request while the profiler is enabled
+    """
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpoint = scope.get("endpoint")
+            name = endpoint.__name__ if endpoint is not None else scope["path"]
+            self.profiler.timings.record(f"{scope['method']} {name}", time.perf_counter() - start)
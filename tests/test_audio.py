@@ -0,0 +1,75 @@
+import io
+import struct
+import unittest
+
+from fastapi import HTTPException
+
+from soundboar.cli.bench import silent_wav
+from soundboar.util.audio import AudioInfo, sniff, check_audio, check_audio_stream
+
+MP3_FRAME = b"\xff\xfb\x90\x00" + bytes(100)
+"""Header of an MPEG 1 layer 3 frame, 44.1 kHz stereo"""
+
+
+def flac_header(sample_rate: int, channels: int) -> bytes:
+    # STREAMINFO block header and block and frame sizes, then sample rate (20 bits) and channels - 1 (3 bits)
+    return b"fLaC" + b"\x00\x00\x00\x22" + bytes(10) + bytes([
+        sample_rate >> 12, sample_rate >> 4 & 0xff, (sample_rate & 0x0f) << 4 | (channels - 1) << 1
+    ]) + bytes(20)
+
+
+def ogg_header(packet: bytes) -> bytes:
+    # Page header with a single segment
+    return b"OggS" + bytes(22) + b"\x01" + bytes([len(packet)]) + packet
+
+
+class SniffTest(unittest.TestCase):
+    def test_wav(self):
+        self.assertEqual(sniff(silent_wav(sample_rate=8000)), AudioInfo("wav", 8000, 1))
+
+    def test_flac(self):
+        self.assertEqual(sniff(flac_header(44100, 2)), AudioInfo("flac", 44100, 2))
+
+    def test_ogg_vorbis(self):
+        packet = b"\x01vorbis" + bytes(4) + b"\x02" + struct.pack("<I", 48000) + bytes(16)
+        self.assertEqual(sniff(ogg_header(packet)), AudioInfo("ogg", 48000, 2))
+
+    def test_ogg_opus(self):
+        packet = b"OpusHead\x01\x01" + bytes(2) + struct.pack("<I", 48000) + bytes(4)
+        self.assertEqual(sniff(ogg_header(packet)), AudioInfo("ogg", 48000, 1))
+
+    def test_mp3_frame_sync(self):
+        self.assertEqual(sniff(MP3_FRAME), AudioInfo("mp3", 44100, 2))
+
+    def test_mp3_id3(self):
+        # ID3v2.4 tag of 200 bytes, the size is a syncsafe integer
+        tag = b"ID3\x04\x00\x00" + bytes([0, 0, 200 >> 7, 200 & 0x7f]) + bytes(200)
+        self.assertEqual(sniff(tag + MP3_FRAME), AudioInfo("mp3", 44100, 2))
+
+    def test_invalid_frame_sync(self):
+        self.assertIsNone(sniff(b"\xff\xe9\x90\x00"))  # Reserved MPEG version
+        self.assertIsNone(sniff(b"<html>"))
+
+
+class CheckAudioTest(unittest.TestCase):
+    def test_matching_extension(self):
+        self.assertEqual(check_audio(MP3_FRAME, ".MP3").format, "mp3")
+
+    def test_mismatched_extension(self):
+        with self.assertRaises(HTTPException) as context:
+            check_audio(silent_wav(), ".mp3")
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_no_audio(self):
+        with self.assertRaises(HTTPException):
+            check_audio(b"MZ\x90\x00", ".wav")
+
+    def test_stream_returns_complete_content(self):
+        content = silent_wav(seconds=2)
+        info, stream = check_audio_stream(io.BytesIO(content), ".wav")
+        self.assertEqual(info.format, "wav")
+        self.assertEqual(stream.read(), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import asyncio
+import unittest
+
+from soundboar.util.CallbackToAsync import MakeAsync
+
+
+class MakeAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def test_replay(self):
+        events = MakeAsync()
+        events.bind()
+        since = events.sequence
+        events.event("a")
+        events.event("b")
+        subscription = events.subscribe(since)
+        self.assertEqual((await anext(subscription))[1], (("a",), {}))
+        self.assertEqual((await anext(subscription))[1], (("b",), {}))
+
+    async def test_since_in_the_future_waits(self):
+        events = MakeAsync()
+        events.bind()
+        task = asyncio.create_task(anext(events.subscribe(events.sequence + 1000)))
+        # The subscription must wait instead of starving the event loop
+        await asyncio.sleep(.05)
+        self.assertFalse(task.done())
+        task.cancel()
+
+
+if __name__ == "__main__":
+    unittest.main()
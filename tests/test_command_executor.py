@@ -0,0 +1,84 @@
+import asyncio
+import functools
+import threading
+import unittest
+
+from soundboar.player.CommandExecutor import CommandExecutor, Priority
+from soundboar.player.NullPlayer import NullPlayer
+from soundboar.player.Player import Player
+from soundboar.player.commands import combine_pause
+
+
+class CommandExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = CommandExecutor()
+        self.addCleanup(self.executor.shutdown)
+        self.player = NullPlayer()
+        self.release = threading.Event()
+        # Keeps the executor busy so that the following commands queue up
+        self.blocker = self.executor.submit(self.release.wait, 5, priority=Priority.TRANSPORT)
+
+    def run_queued(self):
+        self.release.set()
+        self.executor.submit(lambda: None, priority=Priority.QUERY).result(5)
+
+    def test_cancelled_future(self):
+        cancelled = self.executor.submit(self.player.play, "a.wav")
+        self.assertTrue(cancelled.cancel())
+        self.run_queued()
+        self.assertEqual(self.executor.submit(self.player.size).result(5), 0)
+
+    def test_cancelled_wrapped_future(self):
+        async def cancel():
+            task = asyncio.ensure_future(asyncio.wrap_future(self.executor.submit(self.player.play, "a.wav")))
+            await asyncio.sleep(0)
+            task.cancel()
+
+        asyncio.run(cancel())
+        self.run_queued()
+        self.assertTrue(self.executor._thread.is_alive())
+        self.assertEqual(self.executor.submit(self.player.add, "b.wav").result(5), "b.wav")
+
+    def test_merge_consecutive(self):
+        futures = [self.executor.submit(self.player.volume, volume, key="volume") for volume in (10, 20, 30)]
+        self.run_queued()
+        self.assertEqual([future.result(5) for future in futures], [30, 30, 30])
+        self.assertEqual(self.executor.stats()["merged"], 2)
+
+    def test_clear_add_clear(self):
+        self.executor.submit(self.player.clear, key="clear")
+        self.executor.submit(self.player.add, "a.wav")
+        self.executor.submit(self.player.clear, key="clear")
+        self.run_queued()
+        self.assertEqual(self.player.size(), 0)
+
+    def test_stop_play_stop(self):
+        self.executor.submit(self.player.stop, priority=Priority.TRANSPORT, key="stop")
+        self.executor.submit(self.player.play, "a.wav", priority=Priority.TRANSPORT)
+        self.executor.submit(self.player.stop, priority=Priority.TRANSPORT, key="stop")
+        self.run_queued()
+        self.assertEqual(self.player.state(), Player.State.STOPPED)
+
+    def test_toggle_play_toggle(self):
+        combine = functools.partial(combine_pause, self.player)
+        for submit in ("toggle", "play", "toggle"):
+            if submit == "play":
+                self.executor.submit(self.player.play, "a.wav", priority=Priority.TRANSPORT)
+            else:
+                self.executor.submit(
+                    self.player.pause, None, priority=Priority.TRANSPORT, key="pause", combine=combine
+                )
+        self.run_queued()
+        self.assertEqual(self.player.state(), Player.State.PAUSED)
+
+    def test_merge_across_other_priorities(self):
+        self.executor.submit(self.player.volume, 10, priority=Priority.TRANSPORT, key="volume")
+        self.executor.submit(self.player.add, "a.wav")
+        self.executor.submit(self.player.volume, 20, priority=Priority.TRANSPORT, key="volume")
+        self.run_queued()
+        self.assertEqual(self.player.volume(), 20)
+        self.assertEqual(self.executor.stats()["merged"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from soundboar.player.NullPlayer import NullPlayer
+from soundboar.player.commands import combine_pause, is_paused
+
+
+class CombinePauseTest(unittest.TestCase):
+    def setUp(self):
+        self.player = NullPlayer()
+        self.player.play("a.wav")
+
+    def combine(self, *states: bool | None):
+        call = self.player.pause, (states[0],)
+        for state in states[1:]:
+            call = combine_pause(self.player, call, (self.player.pause, (state,)))
+        return call
+
+    def test_toggle(self):
+        self.assertEqual(self.combine(None), (self.player.pause, (None,)))
+
+    def test_toggle_toggle(self):
+        self.assertEqual(self.combine(None, None), (is_paused, (self.player,)))
+
+    def test_toggle_three_times(self):
+        fn, args = self.combine(None, None, None)
+        self.assertEqual((fn, args), (self.player.pause, (None,)))
+        fn(*args)
+        self.assertTrue(is_paused(self.player))
+
+    def test_toggle_four_times(self):
+        fn, args = self.combine(None, None, None, None)
+        fn(*args)
+        self.assertFalse(is_paused(self.player))
+
+    def test_explicit_then_toggle(self):
+        self.assertEqual(self.combine(True, None), (self.player.pause, (False,)))
+        self.assertEqual(self.combine(False, None), (self.player.pause, (True,)))
+
+    def test_explicit_wins(self):
+        self.assertEqual(self.combine(None, None, True), (self.player.pause, (True,)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import io
+import unittest
+import zipfile
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from soundboar.cli.bench import silent_wav
+from soundboar.repository.Importer import Importer
+from soundboar.repository.Repository import Repository
+
+
+class ImporterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = Repository([Path(self.tmp.name)], {".wav"})
+        self.importer = Importer(self.repo)
+
+    def test_corrupt_zip(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as f:
+            f.writestr("zipped.wav", silent_wav())
+        archive.seek(0)
+        results = self.importer.import_files([
+            ("broken.zip", io.BytesIO(b"not a zip archive")),
+            ("a.wav", io.BytesIO(silent_wav())),
+            ("sounds.zip", archive),
+            ("broken-too.zip", io.BytesIO(b"")),
+        ])
+        self.assertEqual([result.name for result in results], ["broken.zip", "a.wav", "zipped.wav", "broken-too.zip"])
+        self.assertTrue(results[0].error.startswith("Invalid zip archive"))
+        self.assertTrue(results[3].error.startswith("Invalid zip archive"))
+        self.assertEqual([result.info[0] for result in results[1:3]], ["a.wav", "zipped.wav"])
+        self.assertIn("zipped.wav", self.repo.catalog)
+
+
+if __name__ == "__main__":
+    unittest.main()
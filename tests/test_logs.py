@@ -0,0 +1,36 @@
+import logging
+import logging.config
+import os
+import unittest
+from unittest import mock
+
+from soundboar import logs
+
+
+class RateLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(logging.config.dictConfig, logs.DEFAULT_LOG_CONFIG)
+
+    def handled(self, name: str, count: int, level: int = logging.INFO) -> int:
+        handler = logging.getLogger(name.split(".")[0]).handlers[0]
+        return sum(
+            bool(handler.filter(logging.LogRecord(name, level, __file__, 0, "message", None, None)))
+            for _ in range(count)
+        )
+
+    def test_child_loggers_are_limited(self):
+        with mock.patch.dict(os.environ, {"SOUNDBOAR_LOG_RATE_LIMIT": "urllib3=1", "SOUNDBOAR_LOG_QUEUE": "0"}):
+            logs.setup()
+        self.assertEqual(self.handled("urllib3.connectionpool", 5), 1)
+        self.assertEqual(self.handled("urllib3.connectionpool", 5, logging.WARNING), 5)
+        self.assertEqual(self.handled("uvicorn.error", 5), 5)
+
+    def test_sampling(self):
+        with mock.patch.dict(os.environ, {"SOUNDBOAR_LOG_SAMPLING": "uvicorn=0", "SOUNDBOAR_LOG_QUEUE": "0"}):
+            logs.setup()
+        self.assertEqual(self.handled("uvicorn.error", 5), 0)
+        self.assertEqual(self.handled("urllib3.connectionpool", 5), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
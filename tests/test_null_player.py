@@ -0,0 +1,33 @@
+import unittest
+
+from soundboar.player.NullPlayer import NullPlayer
+from soundboar.player.Player import Player
+
+
+class NullPlayerMoveTest(unittest.TestCase):
+    def setUp(self):
+        self.player = NullPlayer()
+        self.player.play("a.wav")
+        self.player.add("b.wav")
+
+    def test_move(self):
+        self.player.move(0, 1)
+        self.assertEqual(list(self.player.identifiers_from_to(0, 1)), ["b.wav", "a.wav"])
+        self.assertEqual(self.player.index(), 1)
+
+    def test_move_out_of_bounds(self):
+        for index, new_index in ((0, 10), (5, 0), (-1, 0), (0, 2)):
+            with self.subTest(index=index, new_index=new_index):
+                with self.assertRaises(IndexError):
+                    self.player.move(index, new_index)
+                self.assertEqual(list(self.player.identifiers_from_to(0, 1)), ["a.wav", "b.wav"])
+                self.assertEqual(self.player.index(), 0)
+
+    def test_restore_index_out_of_bounds(self):
+        self.player.restore(Player.Snapshot(identifiers=["a.wav"], index=1, state=Player.State.PLAYING))
+        self.assertEqual(self.player.size(), 1)
+        self.assertIsNone(self.player.index())
+
+
+if __name__ == "__main__":
+    unittest.main()
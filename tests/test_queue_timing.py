@@ -0,0 +1,67 @@
+import unittest
+
+from soundboar.player.QueueTiming import QueueTiming
+
+
+class QueueTimingTest(unittest.TestCase):
+    def setUp(self):
+        self.timing = QueueTiming()
+        for duration in (1000, 2000, 3000):
+            self.timing.insert(None, duration)
+
+    def starts(self) -> list[int]:
+        return [self.timing.start(index) for index in range(len(self.timing) + 1)]
+
+    def test_start(self):
+        self.assertEqual(self.starts(), [0, 1000, 3000, 6000])
+        self.assertEqual(self.timing.total(), 6000)
+
+    def test_start_clamped(self):
+        self.assertEqual(self.timing.start(-1), 0)
+        self.assertEqual(self.timing.start(10), 6000)
+
+    def test_insert(self):
+        self.timing.start(3)
+        self.timing.insert(1, 500)
+        self.assertEqual(self.timing.durations, [1000, 500, 2000, 3000])
+        self.assertEqual(self.starts(), [0, 1000, 1500, 3500, 6500])
+        self.timing.insert(10, 100)
+        self.assertEqual(self.timing.durations[-1], 100)
+        self.assertEqual(self.timing.total(), 6600)
+
+    def test_remove(self):
+        self.timing.start(3)
+        self.timing.remove(0)
+        self.assertEqual(self.starts(), [0, 2000, 5000])
+        self.timing.remove(-1)
+        self.assertEqual(self.starts(), [0, 2000])
+
+    def test_move(self):
+        self.timing.start(3)
+        self.timing.move(2, 0)
+        self.assertEqual(self.timing.durations, [3000, 1000, 2000])
+        self.assertEqual(self.starts(), [0, 3000, 4000, 6000])
+        self.timing.move(0, 2)
+        self.assertEqual(self.starts(), [0, 1000, 3000, 6000])
+
+    def test_set(self):
+        self.timing.start(3)
+        self.timing.set(1, 500)
+        self.assertEqual(self.starts(), [0, 1000, 1500, 4500])
+
+    def test_unknown_durations(self):
+        self.timing.insert(1, -1)
+        self.assertEqual(self.starts(), [0, 1000, 1000, 3000, 6000])
+        self.timing.set(1, 4000)
+        self.assertEqual(self.starts(), [0, 1000, 5000, 7000, 10000])
+
+    def test_reset(self):
+        self.timing.start(3)
+        self.timing.reset([-1, 100])
+        self.assertEqual(self.starts(), [0, 0, 100])
+        self.timing.reset()
+        self.assertEqual(self.timing.total(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from soundboar.repository.Repository import Repository, Root
+
+
+class RepositoryPathTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        base = Path(self.tmp.name)
+        (base / "sounds").mkdir()
+        (base / "usb").mkdir()
+        (base / "sounds" / "a.wav").write_bytes(b"")
+        (base / "secret.wav").write_bytes(b"")
+        self.base = base
+        self.repo = Repository([base / "sounds", Root(base / "usb", namespace="usb")], {".wav"})
+
+    def test_file_outside_root(self):
+        for identifier in ("../secret.wav", "usb/../../secret.wav", "sub/../../secret.wav"):
+            with self.subTest(identifier):
+                with self.assertRaises(FileNotFoundError):
+                    self.repo.file(identifier)
+
+    def test_delete_outside_root(self):
+        with self.assertRaises(FileNotFoundError):
+            self.repo.delete("../secret.wav")
+        self.assertTrue((self.base / "secret.wav").exists())
+
+    def test_rename_outside_root(self):
+        with self.assertRaises(ValueError):
+            self.repo.rename("a.wav", "../b.wav")
+        self.assertTrue((self.base / "sounds" / "a.wav").exists())
+
+    def test_file_inside_root(self):
+        self.assertEqual(self.repo.file("new.wav"), self.base / "sounds" / "new.wav")
+        self.assertEqual(self.repo.file("usb/new.wav"), self.base / "usb" / "new.wav")
+
+
+class RepositorySearchTest(unittest.TestCase):
+    def test_search_while_writing(self):
+        with TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            (base / "air horn.wav").write_bytes(b"")
+            repo = Repository([base], {".wav"})
+            infos = [(f"horn {i}.wav", f"horn {i}", base / f"horn {i}.wav") for i in range(200)]
+            stop = threading.Event()
+
+            def write():
+                while not stop.is_set():
+                    repo.commit(infos)
+                    for identifier, _, _ in infos:
+                        repo.delete(identifier)
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            try:
+                for _ in range(300):
+                    self.assertTrue(repo.search("horn", 50))
+            finally:
+                stop.set()
+                writer.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from soundboar.repository.SearchIndex import SearchIndex
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex(max_posting=10)
+        self.index.add_all((f"sfx/sound {i}.mp3", f"sound {i}") for i in range(50))
+        self.index.add_all([("memes/air horn.mp3", "air horn"), ("memes/mp3 song.wav", "mp3 song")])
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        return [identifier for identifier, _ in self.index.search(query, limit)]
+
+    def test_suffix_not_indexed(self):
+        self.assertEqual(self.search("mp3"), ["memes/mp3 song.wav"])
+
+    def test_single_character(self):
+        self.assertEqual(self.search("a"), ["memes/air horn.mp3"])
+
+    def test_common_ngrams(self):
+        # " so", "sou", ... are in more entries than max_posting, "orn" finds the candidates
+        self.assertEqual(self.search("sound horn", 1), ["memes/air horn.mp3"])
+        self.assertCountEqual(self.search("sound", 3), ["sfx/sound 0.mp3", "sfx/sound 1.mp3", "sfx/sound 10.mp3"])
+
+    def test_remove(self):
+        self.index.remove("memes/air horn.mp3")
+        self.assertEqual(self.search("horn"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
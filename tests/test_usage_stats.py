@@ -0,0 +1,36 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from soundboar.repository.UsageStats import UsageStats
+
+
+class UsageStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "usage.json"
+        self.catalog = {"a.wav", "b.wav"}
+        self.usage = UsageStats(self.path, keep=self.catalog.__contains__)
+
+    def test_save_prunes_unknown_files(self):
+        for identifier in ("a.wav", "b.wav", "b.wav", "../missing.wav"):
+            self.usage.record(identifier)
+        self.catalog.discard("a.wav")
+        self.usage.save()
+        data = json.loads(self.path.read_text())
+        self.assertEqual(data["counts"], {"b.wav": 2})
+        self.assertEqual(list(data["last_played"]), ["b.wav"])
+        self.assertEqual(self.usage.top(), ["b.wav"])
+
+    def test_prune_marks_dirty(self):
+        self.usage.record("a.wav")
+        self.usage.save()
+        self.catalog.clear()
+        self.usage.save()
+        self.assertEqual(json.loads(self.path.read_text())["counts"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()